@@ -0,0 +1,14 @@
+import os
+
+# IMDb dataset file (https://datasets.imdbws.com/title.ratings.tsv.gz)
+IMDB_RATINGS_PATH = os.getenv("IMDB_RATINGS_PATH", "/data/title.ratings.tsv.gz")
+
+# Packed (title, rating, votes) record of the last successful load; rows
+# that match it are skipped on the next run
+FINGERPRINT_PATH = os.getenv("FINGERPRINT_PATH", "/data/title.ratings.fp")
+
+# Decompressed bytes parsed per step (memory stays flat however big the file)
+INGEST_CHUNK_BYTES = int(os.getenv("INGEST_CHUNK_BYTES", str(1024 * 1024)))
+# Operations per unordered bulk_write, and how many run at once
+INGEST_BULK_SIZE = int(os.getenv("INGEST_BULK_SIZE", "5000"))
+INGEST_WRITERS = int(os.getenv("INGEST_WRITERS", "4"))
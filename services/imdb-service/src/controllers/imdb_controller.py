@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+
+from src.config import FINGERPRINT_PATH, IMDB_RATINGS_PATH
+from src.database.mongo import ratings_collection
+from src.index.ratings_index import RatingsIndex
+from src.ingest.fingerprint import tconst_id, tconst_str
+from src.ingest.ratings import ingest_ratings
+
+logger = logging.getLogger(__name__)
+
+# State of the current/last ingestion run (one at a time per process)
+ingest_state = {"status": "idle"}
+_ingest_task: asyncio.Task | None = None
+
+# Ratings index of the last successful load (None until there is one),
+# and the (inode, mtime, size) of the file it was opened from
+_index: RatingsIndex | None = None
+_index_file: tuple | None = None
+_index_lock = asyncio.Lock()
+
+
+# ----------------------------------------
+# Start loading the ratings file (IMDB_RATINGS_PATH) in the background
+# Returns the run's state ({ status: "running", ... })
+# ----------------------------------------
+async def start_ingest():
+    global _ingest_task
+    if _ingest_task is not None and not _ingest_task.done():
+        raise HTTPException(status_code=409, detail="An ingestion is already running")
+
+    path = IMDB_RATINGS_PATH
+    ingest_state.clear()
+    ingest_state.update({
+        "status": "running",
+        "path": path,
+        "startedAt": datetime.now(timezone.utc),
+    })
+    _ingest_task = asyncio.create_task(run_ingest(path))
+    return ingest_state
+
+
+async def run_ingest(path: str):
+    try:
+        # Parsing and the blocking bulk writes stay off the event loop
+        stats = await asyncio.to_thread(ingest_ratings, path)
+    except Exception as e:
+        logger.exception("IMDb ratings ingestion failed")
+        ingest_state.update({"status": "failed", "error": str(e)})
+    else:
+        ingest_state.update({"status": "done", "stats": stats})
+        await load_index()
+    finally:
+        ingest_state["finishedAt"] = datetime.now(timezone.utc)
+
+
+# ----------------------------------------
+# Current/last ingestion run
+# ----------------------------------------
+def get_ingest_state():
+    return ingest_state
+
+
+# ----------------------------------------
+# Ratings index: (re)open the fingerprint of the last load. The swap
+# happens on the event loop, between lookups, so the old map can be
+# closed straight away.
+# ----------------------------------------
+def _fingerprint_file():
+    try:
+        st = os.stat(FINGERPRINT_PATH)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+async def load_index():
+    global _index, _index_file
+    # Taken before opening: a file swapped in meanwhile is picked up next time
+    _index_file = _fingerprint_file()
+    try:
+        index = await asyncio.to_thread(RatingsIndex, FINGERPRINT_PATH)
+    except (FileNotFoundError, ValueError):
+        index = None
+
+    old, _index = _index, index
+    if old is not None:
+        old.close()
+
+
+# The fingerprint is also replaced by runs outside this process (the
+# nightly src/scripts/imdb_ratings.py): reopen it when it has changed
+async def refresh_index():
+    if _fingerprint_file() == _index_file:
+        return
+    async with _index_lock:
+        if _fingerprint_file() != _index_file:
+            await load_index()
+
+
+def close_index():
+    global _index
+    if _index is not None:
+        _index.close()
+        _index = None
+
+
+# ----------------------------------------
+# Batch ratings: ids -> { tconst: { averageRating, numVotes } }
+# Titles without a rating (or malformed ids) are left out
+# ----------------------------------------
+async def get_ratings(ids: list[str]):
+    title_ids = []
+    for tconst in ids:
+        if isinstance(tconst, str) and tconst.startswith("tt") and tconst[2:].isdigit():
+            title_ids.append(tconst_id(tconst))
+
+    await refresh_index()
+    if _index is not None:
+        return _index.lookup(title_ids)
+
+    # No load on disk yet (or the last file wasn't sorted): ask Mongo
+    return await asyncio.to_thread(find_ratings, [tconst_str(i) for i in title_ids])
+
+
+def find_ratings(tconsts: list[str]):
+    cursor = ratings_collection.find({"_id": {"$in": tconsts}})
+    return {
+        doc["_id"]: {"averageRating": doc["averageRating"], "numVotes": doc["numVotes"]}
+        for doc in cursor
+    }
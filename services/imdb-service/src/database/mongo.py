@@ -0,0 +1,21 @@
+from pymongo import MongoClient
+import os
+
+# Mongo connection URL (the movie-service database)
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://movie-db:27017")
+
+# Database name
+DB_NAME = os.getenv("DB_NAME", "movies")
+
+# Ingestion runs on worker threads, so a plain (blocking) client is enough
+client = MongoClient(MONGO_URI)
+
+# Access database
+db = client[DB_NAME]
+
+# movie-service's ImdbRatings model: { _id: tconst, averageRating, numVotes }
+ratings_collection = db["ratings"]
+
+# Identity of the last ratings load ({ _id: "ratings", loadId, titles }),
+# matched against the fingerprint's before writing only what changed
+meta_collection = db["imdb_meta"]
@@ -0,0 +1,57 @@
+import mmap
+
+import numpy as np
+
+from src.ingest.fingerprint import VOTES_BITS, VOTES_MASK, tconst_str
+
+
+# ---------------------------------------
+# Read-only ratings index over a fingerprint file (see ingest/fingerprint):
+# sorted uint32 title ids interleaved with packed rating/votes.
+#
+# The file is memory mapped, so startup doesn't parse anything and the
+# packed column is shared with the OS page cache; only the ids column is
+# copied out (4 bytes per title) so it can be binary-searched contiguously.
+# Lookups are vectorized: one searchsorted for the whole batch.
+# ---------------------------------------
+class RatingsIndex:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            # ValueError for an empty file
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        pairs = np.frombuffer(self._mm, dtype=np.uint32).reshape(-1, 2)
+        # (always a copy: a view would pin the map open)
+        self.ids = pairs[:, 0].copy()
+        self.packed = pairs[:, 1]
+
+    def __len__(self):
+        return len(self.ids)
+
+    # Title ids → { tconst: { averageRating, numVotes } } for those found
+    def lookup(self, title_ids):
+        query = np.unique(np.fromiter(title_ids, dtype=np.int64))
+        # Same dtype as the ids column, or searchsorted converts all of it
+        query = query[(query >= 0) & (query <= np.iinfo(np.uint32).max)].astype(np.uint32)
+        if not len(query) or not len(self.ids):
+            return {}
+
+        pos = np.searchsorted(self.ids, query)
+        pos[pos == len(self.ids)] = 0
+        hit = self.ids[pos] == query
+
+        packed = self.packed[pos[hit]]
+        ratings = (packed >> VOTES_BITS) / 10
+        votes = packed & VOTES_MASK
+
+        return {
+            tconst_str(title_id): {"averageRating": rating, "numVotes": num_votes}
+            for title_id, rating, num_votes in zip(
+                query[hit].tolist(), ratings.tolist(), votes.tolist()
+            )
+        }
+
+    def close(self):
+        # Views into the map have to go before it can be closed
+        self.packed = None
+        self._mm.close()
@@ -0,0 +1,92 @@
+import mmap
+import os
+import uuid
+from array import array
+
+# ---------------------------------------
+# Compact record of a ratings load: for every title, in tconst order, two
+# native uint32s — the numeric tconst (tt0111161 → 111161) and the rating
+# and vote count packed together. ~8 bytes per title, ~12MB for the full
+# dataset.
+# ---------------------------------------
+VOTES_BITS = 25
+VOTES_MASK = (1 << VOTES_BITS) - 1
+
+
+# 8.3 with 2,950,000 votes → 83 << 25 | 2950000
+def pack(rating10: int, votes: int) -> int:
+    return rating10 << VOTES_BITS | min(votes, VOTES_MASK)
+
+
+def unpack(packed: int) -> tuple[float, int]:
+    return (packed >> VOTES_BITS) / 10, packed & VOTES_MASK
+
+
+def tconst_id(tconst: bytes | str) -> int:
+    return int(tconst[2:])
+
+
+def tconst_str(title_id: int) -> str:
+    return f"tt{title_id:07d}"
+
+
+# The load a fingerprint belongs to is named by a random id, kept beside
+# it in "<path>.load" and in Mongo (see ingest_ratings)
+def load_id_path(path):
+    return f"{path}.load"
+
+
+def read_load_id(path):
+    try:
+        with open(load_id_path(path)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+# (title_id, packed) pairs of a fingerprint file, in order, read through
+# an mmap so the file is never loaded whole. Missing file → nothing.
+def read_fingerprint(path):
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+
+    with f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            values = memoryview(mm).cast("I")
+            try:
+                for i in range(0, len(values) - 1, 2):
+                    yield values[i], values[i + 1]
+            finally:
+                values.release()
+
+
+# Appends pairs to a temp file; commit() swaps it in, discard() drops it
+class FingerprintWriter:
+    def __init__(self, path):
+        self.path = path
+        self.tmp = f"{path}.{os.getpid()}.tmp"
+        self.load_id = uuid.uuid4().hex
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(self.tmp, "wb")
+
+    def write(self, values: array):
+        values.tofile(self.file)
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.tmp, self.path)
+        tmp = f"{load_id_path(self.path)}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.load_id)
+        os.replace(tmp, load_id_path(self.path))
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.unlink(self.tmp)
+        except OSError:
+            pass
@@ -0,0 +1,240 @@
+import gzip
+import logging
+import os
+import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from pymongo import DeleteOne, UpdateOne
+
+from src.config import (
+    FINGERPRINT_PATH,
+    IMDB_RATINGS_PATH,
+    INGEST_BULK_SIZE,
+    INGEST_CHUNK_BYTES,
+    INGEST_WRITERS,
+)
+from src.database.mongo import meta_collection, ratings_collection
+from src.ingest.fingerprint import (
+    FingerprintWriter,
+    load_id_path,
+    pack,
+    read_fingerprint,
+    read_load_id,
+    tconst_id,
+    tconst_str,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------
+# Stream title.ratings.tsv.gz, decompressing and parsing a fixed number of
+# bytes at a time. Yields lists of (title_id, rating10, votes).
+# ---------------------------------------
+def iter_rating_chunks(path, chunk_bytes=INGEST_CHUNK_BYTES):
+    with gzip.open(path, "rb") as f:
+        header = f.readline()
+        if not header.startswith(b"tconst\t"):
+            raise ValueError(f"{path} doesn't look like title.ratings.tsv")
+
+        rest = b""
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                break
+
+            lines = (rest + block).split(b"\n")
+            rest = lines.pop()
+            yield [row for row in map(parse_row, lines) if row]
+
+        if rest:
+            yield [row for row in map(parse_row, [rest]) if row]
+
+
+# b"tt0111161\t9.3\t2950000" → (111161, 93, 2950000); None for junk lines
+def parse_row(line: bytes):
+    try:
+        tconst, rating, votes = line.rstrip(b"\r").split(b"\t")
+        return tconst_id(tconst), round(float(rating) * 10), int(votes)
+    except ValueError:
+        return None
+
+
+def rating_op(title_id, rating10, votes):
+    return UpdateOne(
+        {"_id": tconst_str(title_id)},
+        {"$set": {"averageRating": rating10 / 10, "numVotes": votes}},
+        upsert=True,
+    )
+
+
+# ---------------------------------------
+# Unordered bulk writes on a few threads, with a bounded number in flight
+# so parsing never runs far ahead of Mongo
+# ---------------------------------------
+class BulkWriter:
+    def __init__(self, collection, bulk_size=INGEST_BULK_SIZE, workers=INGEST_WRITERS):
+        self.collection = collection
+        self.bulk_size = bulk_size
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="ingest")
+        self.max_inflight = workers * 2
+        self.inflight = set()
+        self.ops = []
+        self.upserted = self.modified = self.deleted = 0
+
+    def add(self, op):
+        self.ops.append(op)
+        if len(self.ops) >= self.bulk_size:
+            self._submit()
+
+    def _submit(self):
+        if not self.ops:
+            return
+        while len(self.inflight) >= self.max_inflight:
+            done, self.inflight = wait(self.inflight, return_when=FIRST_COMPLETED)
+            self._collect(done)
+        ops, self.ops = self.ops, []
+        self.inflight.add(self.executor.submit(self.collection.bulk_write, ops, ordered=False))
+
+    def _collect(self, done):
+        for future in done:
+            result = future.result()
+            self.upserted += result.upserted_count
+            self.modified += result.modified_count
+            self.deleted += result.deleted_count
+
+    # Flush the rest and wait for every write (raises the first failure)
+    def close(self):
+        try:
+            self._submit()
+            self._collect(wait(self.inflight).done)
+        finally:
+            self.inflight = set()
+            self.executor.shutdown(wait=True)
+
+    # Give up: drop queued writes, let running ones finish
+    def abort(self):
+        self.ops = []
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Whether `collection` still holds the load `load_id` names
+def loaded_into(collection, meta, load_id):
+    if load_id is None:
+        return False
+    doc = meta.find_one({"_id": "ratings"})
+    return (doc is not None and doc.get("loadId") == load_id
+            and doc.get("titles") == collection.estimated_document_count())
+
+
+# ---------------------------------------
+# Load the ratings file into Mongo, writing only what changed since the
+# last load.
+#
+# Both the dataset and the previous fingerprint are sorted by tconst, so
+# they're merge-joined while streaming: rows whose packed rating/votes
+# match are skipped, new or changed ones are upserted and titles that
+# disappeared are deleted. The new fingerprint replaces the old one only
+# after every write succeeded, so a failed run is simply redone in full.
+#
+# The fingerprint only describes Mongo if Mongo still holds that load: its
+# id and title count are recorded in imdb_meta, and if they don't match
+# (collection dropped, restored or re-pointed) every row is written.
+#
+# If the file turns out not to be sorted the join can't be trusted: every
+# row from there on is written and no fingerprint is kept.
+# ---------------------------------------
+def ingest_ratings(path=IMDB_RATINGS_PATH, fingerprint_path=FINGERPRINT_PATH,
+                   collection=None, meta=None):
+    started = time.monotonic()
+    collection = collection if collection is not None else ratings_collection
+    meta = meta if meta is not None else meta_collection
+
+    full = not loaded_into(collection, meta, read_load_id(fingerprint_path))
+    if full:
+        logger.info("ratings in Mongo don't match %s; writing every row",
+                    fingerprint_path)
+    previous = iter(()) if full else read_fingerprint(fingerprint_path)
+    prev_id, prev_packed = next(previous, (None, None))
+    sorted_input = True
+    last_id = -1
+    rows = unchanged = 0
+
+    writer = BulkWriter(collection)
+    fingerprint = FingerprintWriter(fingerprint_path)
+    try:
+        for chunk in iter_rating_chunks(path):
+            values = array("I")
+
+            for title_id, rating10, votes in chunk:
+                rows += 1
+                packed = pack(rating10, votes)
+
+                if title_id <= last_id:
+                    if sorted_input:
+                        logger.warning("%s isn't sorted by tconst; writing every row", path)
+                    sorted_input = False
+                last_id = title_id
+
+                if not sorted_input:
+                    writer.add(rating_op(title_id, rating10, votes))
+                    continue
+
+                # Titles in the previous load that this one skipped over are gone
+                while prev_id is not None and prev_id < title_id:
+                    writer.add(DeleteOne({"_id": tconst_str(prev_id)}))
+                    prev_id, prev_packed = next(previous, (None, None))
+
+                if prev_id == title_id:
+                    same = prev_packed == packed
+                    prev_id, prev_packed = next(previous, (None, None))
+                    if same:
+                        unchanged += 1
+                        values.extend((title_id, packed))
+                        continue
+
+                writer.add(rating_op(title_id, rating10, votes))
+                values.extend((title_id, packed))
+
+            fingerprint.write(values)
+
+        if sorted_input:
+            while prev_id is not None:
+                writer.add(DeleteOne({"_id": tconst_str(prev_id)}))
+                prev_id, prev_packed = next(previous, (None, None))
+
+        writer.close()
+    except BaseException:
+        writer.abort()
+        fingerprint.discard()
+        raise
+    finally:
+        if not full:
+            previous.close()
+
+    if sorted_input:
+        fingerprint.commit()
+        meta.update_one(
+            {"_id": "ratings"},
+            {"$set": {"loadId": fingerprint.load_id,
+                      "titles": collection.estimated_document_count()}},
+            upsert=True,
+        )
+    else:
+        fingerprint.discard()
+        for stale in (fingerprint_path, load_id_path(fingerprint_path)):
+            try:
+                os.unlink(stale)
+            except OSError:
+                pass
+
+    return {
+        "full": full,
+        "rows": rows,
+        "unchanged": unchanged,
+        "upserted": writer.upserted,
+        "modified": writer.modified,
+        "deleted": writer.deleted,
+        "seconds": round(time.monotonic() - started, 2),
+    }
@@ -0,0 +1,22 @@
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from src.controllers.imdb_controller import close_index, load_index
+from src.routes.imdb import router as imdb_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Map the last load's ratings index (instant: nothing is read up front)
+    await load_index()
+    yield
+    close_index()
+
+
+app = FastAPI(title="IMDb Service", lifespan=lifespan)
+
+app.include_router(imdb_router)
+
+@app.get("/")
+def root():
+    return {"message": "IMDb Service Running"}
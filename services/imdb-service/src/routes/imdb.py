@@ -0,0 +1,25 @@
+from fastapi import APIRouter, HTTPException
+from src.controllers.imdb_controller import (
+    get_ingest_state,
+    get_ratings,
+    start_ingest,
+)
+
+router = APIRouter(prefix="/imdb")
+
+# Loads IMDB_RATINGS_PATH; other files go through src/scripts/imdb_ratings.py
+@router.post("/ingest", status_code=202)
+async def route_start_ingest():
+    return await start_ingest()
+
+@router.get("/ingest")
+async def route_ingest_state():
+    return get_ingest_state()
+
+# { "ids": ["tt0111161", ...] } → { "tt0111161": { averageRating, numVotes } }
+@router.post("/ratings/batch")
+async def route_ratings_batch(body: dict):
+    ids = body.get("ids", [])
+    if not isinstance(ids, list):
+        raise HTTPException(status_code=400, detail="ids must be a list")
+    return await get_ratings(ids)
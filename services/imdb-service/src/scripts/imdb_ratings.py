@@ -0,0 +1,17 @@
+import sys
+import json
+from pathlib import Path
+
+# Allow running as `python3 src/scripts/imdb_ratings.py [title.ratings.tsv.gz]`
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.config import IMDB_RATINGS_PATH  # noqa: E402
+from src.ingest.ratings import ingest_ratings  # noqa: E402
+
+
+if __name__ == "__main__":
+    # Loads the file into movie-db's ratings and prints what was written
+    path = sys.argv[1] if len(sys.argv) > 1 else IMDB_RATINGS_PATH
+    stats = ingest_ratings(path)
+
+    print(json.dumps(stats), flush=True)
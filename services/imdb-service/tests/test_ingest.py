@@ -0,0 +1,117 @@
+import gzip
+
+import pytest
+from pymongo import DeleteOne, UpdateOne
+
+from src.ingest.ratings import ingest_ratings
+
+
+# ---------------------------------------
+# Just enough of a pymongo collection for ingest_ratings: applies the
+# bulk ops to a dict and records them
+# ---------------------------------------
+class FakeResult:
+    def __init__(self, upserted=0, modified=0, deleted=0):
+        self.upserted_count = upserted
+        self.modified_count = modified
+        self.deleted_count = deleted
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+        self.writes = []
+
+    def bulk_write(self, ops, ordered=True):
+        upserted = modified = deleted = 0
+        for op in ops:
+            _id = op._filter["_id"]
+            if isinstance(op, UpdateOne):
+                self.writes.append(("set", _id))
+                if _id in self.docs:
+                    modified += 1
+                else:
+                    upserted += 1
+                self.docs[_id] = dict(op._doc["$set"])
+            elif isinstance(op, DeleteOne):
+                self.writes.append(("delete", _id))
+                deleted += int(self.docs.pop(_id, None) is not None)
+        return FakeResult(upserted, modified, deleted)
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+    def find_one(self, query):
+        doc = self.docs.get(query["_id"])
+        return dict(doc) if doc is not None else None
+
+    def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["_id"], {}).update(update["$set"])
+
+
+def write_ratings(path, rows):
+    with gzip.open(path, "wt") as f:
+        f.write("tconst\taverageRating\tnumVotes\n")
+        for tconst, rating, votes in rows:
+            f.write(f"{tconst}\t{rating}\t{votes}\n")
+
+
+@pytest.fixture
+def load(tmp_path):
+    collection, meta = FakeCollection(), FakeCollection()
+    data = tmp_path / "title.ratings.tsv.gz"
+    fingerprint = tmp_path / "title.ratings.fp"
+
+    def run(rows):
+        write_ratings(data, rows)
+        collection.writes.clear()
+        return ingest_ratings(str(data), str(fingerprint), collection, meta)
+
+    run.collection = collection
+    return run
+
+
+BASE = [("tt0000001", 5.6, 2000), ("tt0000002", 6.1, 270), ("tt0000003", 6.5, 1900)]
+
+
+def test_first_load_writes_everything(load):
+    stats = load(BASE)
+    assert stats["full"] and stats["upserted"] == 3
+    assert load.collection.docs["tt0000002"] == {"averageRating": 6.1, "numVotes": 270}
+
+
+def test_unchanged_rows_are_skipped(load):
+    load(BASE)
+    stats = load(BASE)
+    assert not stats["full"]
+    assert stats["unchanged"] == 3
+    assert load.collection.writes == []
+
+
+def test_changed_new_and_deleted_rows(load):
+    load(BASE)
+    stats = load([("tt0000001", 5.6, 2000), ("tt0000003", 6.6, 1950), ("tt0000004", 7.0, 10)])
+    assert stats["unchanged"] == 1
+    assert sorted(load.collection.writes) == [
+        ("delete", "tt0000002"), ("set", "tt0000003"), ("set", "tt0000004"),
+    ]
+    assert load.collection.docs["tt0000003"] == {"averageRating": 6.6, "numVotes": 1950}
+    assert "tt0000002" not in load.collection.docs
+
+
+def test_unsorted_input_writes_every_row(load):
+    load(BASE)
+    stats = load([BASE[0], BASE[2], BASE[1]])
+    assert stats["upserted"] + stats["modified"] + stats["unchanged"] == 3
+    assert ("set", "tt0000002") in load.collection.writes
+
+    # No fingerprint was kept: the next run is a full load again
+    assert load(BASE)["full"]
+
+
+# The collection was emptied behind the fingerprint's back
+def test_dropped_collection_is_reloaded(load):
+    load(BASE)
+    load.collection.docs.clear()
+    stats = load(BASE)
+    assert stats["full"] and stats["upserted"] == 3
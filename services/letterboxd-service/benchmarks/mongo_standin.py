@@ -0,0 +1,221 @@
+import copy
+import sys
+from types import SimpleNamespace
+
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+
+
+# ---------------------------------------
+# In-memory stand-in for the handful of Motor collection calls the service
+# makes, so benchmarks run without a mongod. Not a general Mongo emulator:
+# filters support equality, $in, $lt/$gt/$gte, $exists and $or; updates
+# $set (dotted paths), $inc, $push (with $each) and upserts.
+# ---------------------------------------
+def _get(doc, path):
+    for key in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(key)
+    return doc
+
+
+def _matches(doc, query):
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(_matches(doc, branch) for branch in cond):
+                return False
+            continue
+        value = _get(doc, key)
+        if isinstance(cond, dict) and cond and all(op.startswith("$") for op in cond):
+            for op, arg in cond.items():
+                if op == "$in" and value not in arg:
+                    return False
+                if op == "$lt" and not (value is not None and value < arg):
+                    return False
+                if op == "$gt" and not (value is not None and value > arg):
+                    return False
+                if op == "$gte" and not (value is not None and value >= arg):
+                    return False
+                if op == "$exists" and (value is not None) != arg:
+                    return False
+        elif value != cond:
+            return False
+    return True
+
+
+def _set(doc, path, value):
+    *parents, last = path.split(".")
+    for key in parents:
+        doc = doc.setdefault(key, {})
+    doc[last] = value
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction=1):
+        if isinstance(key, list):
+            key, direction = key[0]
+        self.docs.sort(key=lambda d: (_get(d, key) is None, _get(d, key)),
+                       reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n] if n else self.docs
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return copy.deepcopy(next(self._iter))
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length=None):
+        return [copy.deepcopy(d) for d in self.docs[:length]]
+
+
+class StandInCollection:
+    def __init__(self, name):
+        self.name = name
+        self.docs = {}
+
+    def clear(self):
+        self.docs.clear()
+
+    def _select(self, query):
+        ids = query.get("_id") if query else None
+        if len(query or {}) == 1 and isinstance(ids, dict) and set(ids) == {"$in"}:
+            return [self.docs[i] for i in ids["$in"] if i in self.docs]
+        if len(query or {}) == 1 and ids is not None and not isinstance(ids, dict):
+            return [self.docs[ids]] if ids in self.docs else []
+        return [d for d in list(self.docs.values()) if _matches(d, query or {})]
+
+    def _update(self, query, update, upsert=False):
+        found = self._select(query)
+        if found:
+            doc, upserted = found[0], None
+        elif upsert:
+            doc = {k: v for k, v in query.items() if not isinstance(v, dict)}
+            for key, value in update.get("$setOnInsert", {}).items():
+                _set(doc, key, value)
+            self.docs[doc["_id"]] = doc
+            upserted = doc["_id"]
+        else:
+            return None, None
+
+        for key, value in update.get("$set", {}).items():
+            _set(doc, key, copy.deepcopy(value))
+        for key, value in update.get("$inc", {}).items():
+            _set(doc, key, (_get(doc, key) or 0) + value)
+        for key, value in update.get("$push", {}).items():
+            items = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+            if _get(doc, key) is None:
+                _set(doc, key, [])
+            _get(doc, key).extend(copy.deepcopy(items))
+        return doc, upserted
+
+    def find(self, query=None, projection=None, **kwargs):
+        return Cursor(self._select(query))
+
+    async def find_one(self, query=None, *args, **kwargs):
+        docs = self._select(query)
+        return copy.deepcopy(docs[0]) if docs else None
+
+    async def insert_one(self, doc):
+        self.docs[doc["_id"]] = copy.deepcopy(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def update_one(self, query, update, upsert=False):
+        doc, upserted = self._update(query, update, upsert)
+        matched = int(doc is not None and upserted is None)
+        return SimpleNamespace(matched_count=matched, modified_count=matched,
+                               upserted_id=upserted)
+
+    async def update_many(self, query, update, upsert=False):
+        docs = self._select(query)
+        for doc in docs:
+            self._update({"_id": doc["_id"]}, update)
+        return SimpleNamespace(matched_count=len(docs), modified_count=len(docs))
+
+    async def find_one_and_update(self, query, update, sort=None, upsert=False, **kwargs):
+        docs = self._select(query)
+        if sort:
+            key, direction = sort[0]
+            docs.sort(key=lambda d: _get(d, key), reverse=direction < 0)
+        if not docs:
+            if not upsert:
+                return None
+            doc, _ = self._update(query, update, upsert=True)
+            return copy.deepcopy(doc)
+        doc, _ = self._update({"_id": docs[0]["_id"]}, update)
+        return copy.deepcopy(doc)
+
+    async def delete_one(self, query):
+        docs = self._select(query)
+        if docs:
+            del self.docs[docs[0]["_id"]]
+        return SimpleNamespace(deleted_count=len(docs[:1]))
+
+    async def bulk_write(self, ops, ordered=True):
+        upserted = modified = deleted = 0
+        for op in ops:
+            if isinstance(op, UpdateOne):
+                doc, upserted_id = self._update(op._filter, op._doc, op._upsert)
+                upserted += upserted_id is not None
+                modified += doc is not None and upserted_id is None
+            elif isinstance(op, ReplaceOne):
+                _id = op._filter["_id"]
+                existed = _id in self.docs
+                self.docs[_id] = {"_id": _id, **copy.deepcopy(op._doc)}
+                modified += existed
+                upserted += not existed
+            elif isinstance(op, DeleteOne):
+                deleted += len(self._select(op._filter)[:1])
+                for doc in self._select(op._filter)[:1]:
+                    del self.docs[doc["_id"]]
+        return SimpleNamespace(upserted_count=upserted, modified_count=modified,
+                               deleted_count=deleted, matched_count=modified)
+
+    async def count_documents(self, query):
+        return len(self._select(query))
+
+    async def estimated_document_count(self):
+        return len(self.docs)
+
+    async def create_index(self, *args, **kwargs):
+        return "standin"
+
+
+# ---------------------------------------
+# Point every already-imported src.* module (and the write-behind
+# batchers) at stand-in collections. Returns { name: collection }.
+# ---------------------------------------
+def install():
+    from src.database.write_behind import WriteBehindBatcher
+
+    standins = {}
+
+    def standin_for(collection):
+        name = collection.name
+        if name not in standins:
+            standins[name] = StandInCollection(name)
+        return standins[name]
+
+    for module_name, module in list(sys.modules.items()):
+        if not module_name.startswith("src.") or module is None:
+            continue
+        for attr, value in list(vars(module).items()):
+            if attr.endswith("_collection") and hasattr(value, "name"):
+                setattr(module, attr, standin_for(value))
+            elif isinstance(value, WriteBehindBatcher):
+                value.collection = standin_for(value.collection)
+
+    return standins
@@ -0,0 +1,297 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# ---------------------------------------
+# Offline benchmark of the import paths against a local Letterboxd stand-in
+# (benchmarks/standin.py) and, unless --mongo-uri is given, an in-memory
+# Mongo stand-in (benchmarks/mongo_standin.py).
+#
+#   python3 benchmarks/run.py --sizes 50,500,5000 --output baseline.json
+#   python3 benchmarks/run.py --compare baseline.json
+#
+# Scenarios, each timed per synthetic user size:
+#   watched / watchlist: get_watched_movies / get_watchlist, cold caches
+#   map_cold:            map_letterboxd_to_tmdb over the watched slugs,
+#                        nothing cached (every film page is scraped)
+#   map_warm:            the same once the mappings are in Mongo
+# ---------------------------------------
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from mongo_standin import install as install_mongo_standin  # noqa: E402
+from standin import StandIn, film_slug  # noqa: E402
+
+SCENARIOS = ("watched", "watchlist", "map_cold", "map_warm")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline Letterboxd import benchmarks")
+    parser.add_argument("--sizes", default="50,500,5000",
+                        help="watched-list sizes to benchmark (comma separated)")
+    parser.add_argument("--runs", type=int, default=3, help="runs per scenario and size")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--warmup", type=int, default=1,
+                        help="discarded runs first (starts the parser pool workers)")
+    parser.add_argument("--latency", type=float, default=0.05, help="stand-in latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="± latency jitter (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 500s")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="share of 429s")
+    parser.add_argument("--parser", default=None,
+                        help="PARSER_EXECUTOR to use (process, thread, inline)")
+    parser.add_argument("--upstream-rate", type=float, default=0.0,
+                        help="UPSTREAM_RATE budget in requests/s (0 = unlimited)")
+    parser.add_argument("--page-cache", action="store_true",
+                        help="keep the on-disk page cache on (off by default)")
+    parser.add_argument("--mongo-uri", default=None,
+                        help="use a real mongod (database letterboxd_bench)")
+    parser.add_argument("--output", default=None, help="write results as JSON here")
+    parser.add_argument("--compare", default=None, help="baseline JSON to compare against")
+    return parser.parse_args()
+
+
+# ---------------------------------------
+# Measurements
+# ---------------------------------------
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, round(q / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def parser_pids():
+    from src.scraper import parser_pool
+
+    processes = getattr(parser_pool._executor, "_processes", None) or {}
+    return list(processes)
+
+
+# CPU seconds of this process plus live parser-pool workers
+def cpu_seconds():
+    total = time.process_time()
+    ticks = os.sysconf("SC_CLK_TCK")
+    for pid in parser_pids():
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += (int(fields[11]) + int(fields[12])) / ticks
+        except (OSError, IndexError, ValueError):
+            pass
+    return total
+
+
+# Resident MB of this process plus live parser-pool workers
+def rss_mb():
+    total_kb = 0
+    for pid in ["self", *parser_pids()]:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            pass
+    return total_kb / 1024
+
+
+# Peak of rss_mb(), sampled in the background while the benchmark runs
+class RssSampler:
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0.0
+        self._task = None
+
+    def sample(self):
+        self.peak = max(self.peak, rss_mb())
+
+    async def _run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self.sample()
+
+
+def summarize(samples):
+    seconds = [s["seconds"] for s in samples]
+    pages = sum(s["requests"] for s in samples)
+    total_seconds = sum(seconds)
+    cpu = sum(s["cpu"] for s in samples)
+    return {
+        "runs": len(samples),
+        "p50_ms": round(percentile(seconds, 50) * 1000, 1),
+        # Over a handful of runs a p99 would just be the slowest one
+        "max_ms": round(max(seconds) * 1000, 1),
+        "requests_per_run": pages // len(samples),
+        "pages_per_sec": round(pages / total_seconds, 1) if total_seconds else None,
+        "cpu_ms_per_page": round(cpu / pages * 1000, 3) if pages else None,
+        "results": samples[-1]["results"],
+    }
+
+
+# ---------------------------------------
+# Benchmark
+# ---------------------------------------
+async def benchmark(args):
+    sizes = [int(size) for size in args.sizes.split(",")]
+    scenarios = args.scenarios.split(",")
+    users = {f"user{size}": size for size in sizes}
+
+    standin = StandIn(users, args.latency, args.jitter, args.error_rate, args.rate_429)
+    base_url = await standin.start()
+
+    # The service reads its settings at import time
+    os.environ["LETTERBOXD_BASE_URL"] = base_url
+    os.environ["PAGE_CACHE_DIR"] = tempfile.mkdtemp(prefix="letterboxd-bench-")
+    os.environ["UPSTREAM_RATE"] = str(args.upstream_rate)
+    if not args.page_cache:
+        os.environ["PAGE_CACHE_MAX_BYTES"] = "0"
+    if args.parser:
+        os.environ["PARSER_EXECUTOR"] = args.parser
+    if args.mongo_uri:
+        os.environ["MONGO_URI"] = args.mongo_uri
+        os.environ["DB_NAME"] = "letterboxd_bench"
+
+    from src.controllers import letterboxd_controller as controller
+    from src.database import mongo
+    from src.database.cache import mapping_cache
+    from src.database.write_behind import mapping_writer, unresolved_writer
+    from src.scraper.http import close_session, start_session
+    from src.scraper.parser_pool import shutdown_parser_pool, start_parser_pool
+
+    if args.mongo_uri:
+        collections = [mongo.letterboxd_collection, mongo.unresolved_collection,
+                       mongo.snapshots_collection, mongo.jobs_collection]
+    else:
+        collections = list(install_mongo_standin().values())
+
+    async def reset():
+        await mapping_writer.flush()
+        await unresolved_writer.flush()
+        for collection in collections:
+            if args.mongo_uri:
+                await collection.delete_many({})
+            else:
+                collection.clear()
+        mapping_cache.clear()
+
+    # Resets state for the scenario, returns the (untimed setup excluded)
+    # call to measure
+    async def prepare(scenario, username, size):
+        if scenario == "map_warm":
+            # Mappings from the cold run are in Mongo; only the process cache goes
+            await mapping_writer.flush()
+            mapping_cache.clear()
+        else:
+            await reset()
+
+        if scenario == "watched":
+            return lambda: controller.get_watched_movies(username, full_sync=True)
+        if scenario == "watchlist":
+            return lambda: controller.get_watchlist(username, full_sync=True)
+
+        slugs = [film_slug(i) for i in range(size, 0, -1)]
+        return lambda: controller.map_letterboxd_to_tmdb(slugs)
+
+    await start_session()
+    start_parser_pool()
+    rss = RssSampler()
+    rss.start()
+    await mapping_writer.start()
+    await unresolved_writer.start()
+
+    results = {}
+    try:
+        for _ in range(args.warmup):
+            call = await prepare(scenarios[0], f"user{min(sizes)}", min(sizes))
+            await call()
+
+        for size in sizes:
+            username = f"user{size}"
+            for scenario in scenarios:
+                samples = []
+                for _ in range(args.runs):
+                    call = await prepare(scenario, username, size)
+                    requests, cpu, start = standin.requests, cpu_seconds(), time.perf_counter()
+                    output = await call()
+                    samples.append({
+                        "seconds": time.perf_counter() - start,
+                        "requests": standin.requests - requests,
+                        "cpu": cpu_seconds() - cpu,
+                        "results": len(output),
+                    })
+
+                summary = summarize(samples)
+                results.setdefault(scenario, {})[str(size)] = summary
+                print(f"{scenario:>9} {size:>5} films  p50 {summary['p50_ms']:>9.1f}ms  "
+                      f"max {summary['max_ms']:>9.1f}ms  {summary['pages_per_sec']} pages/s  "
+                      f"{summary['cpu_ms_per_page']} cpu ms/page  "
+                      f"({summary['results']} results)", flush=True)
+    finally:
+        # Before the pool goes: its workers count towards the peak
+        await rss.stop()
+        await unresolved_writer.stop()
+        await mapping_writer.stop()
+        await close_session()
+        shutdown_parser_pool()
+        await standin.stop()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+            "upstream_statuses": {str(k): v for k, v in sorted(standin.statuses.items())},
+            # This process plus the parser workers, sampled during the runs
+            "peak_rss_mb": round(rss.peak, 1),
+        },
+        "results": results,
+    }
+
+
+# p50 / pages-per-second changes against a saved baseline
+def compare(report, baseline):
+    print("\nvs baseline", baseline["meta"]["timestamp"])
+    for scenario, by_size in report["results"].items():
+        for size, now in by_size.items():
+            before = baseline["results"].get(scenario, {}).get(size)
+            if not before:
+                continue
+            p50 = (now["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100
+            print(f"{scenario:>9} {size:>5} films  p50 {before['p50_ms']:.1f} → "
+                  f"{now['p50_ms']:.1f}ms ({p50:+.1f}%)  pages/s "
+                  f"{before['pages_per_sec']} → {now['pages_per_sec']}")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(benchmark(args))
+    print(f"peak RSS {report['meta']['peak_rss_mb']} MB, upstream statuses "
+          f"{report['meta']['upstream_statuses']}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print("saved", args.output)
@@ -0,0 +1,154 @@
+import asyncio
+import random
+import zlib
+from pathlib import Path
+
+from aiohttp import web
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def fixture(name):
+    return (FIXTURES / name).read_text()
+
+
+FILM_PAGE = fixture("film.html")
+LIST_PAGE = fixture("list.html")
+LIST_ITEM = fixture("list_item.html")
+ERROR_PAGE = fixture("error.html").encode()
+
+# Real pages carry a lot of markup around the few elements we read
+PADDING = "\t<!-- " + "x" * 1000 + " -->\n"
+
+
+# ---------------------------------------
+# Synthetic catalogue: film i has slug film-i and TMDB ID 10000 + i.
+# A user's lists are ranges of films; watchlists start past the end of
+# the watched range so they need their own film pages.
+# ---------------------------------------
+def film_slug(i):
+    return f"film-{i}"
+
+
+def film_page(i, padding=20):
+    return FILM_PAGE.format(
+        slug=film_slug(i),
+        title=f"Film {i}",
+        year=1950 + i % 75,
+        rating=round(1 + (i % 40) / 10, 1),
+        votes=100 + i,
+        runtime=80 + i % 100,
+        imdb_id=f"tt{1000000 + i:07d}",
+        tmdb_id=10000 + i,
+        head_padding=PADDING * padding,
+        body_padding=PADDING * padding,
+    ).encode()
+
+
+def list_page(username, films, page, per_page):
+    start = (page - 1) * per_page
+    items = "".join(
+        LIST_ITEM.format(title=f"Film {i}", slug=film_slug(i), film_id=i, rated=i % 11)
+        for i in films[start:start + per_page]
+    )
+    num_pages = max(1, -(-len(films) // per_page))
+    pages = "".join(
+        f'\t\t\t\t\t\t<li class="paginate-page"><a href="/{username}/films/page/{p}/">{p}</a></li>\n'
+        for p in range(1, num_pages + 1)
+    )
+    return LIST_PAGE.format(
+        username=username, items=items, pages=pages, head_padding=PADDING * 10
+    ).encode()
+
+
+# ---------------------------------------
+# aiohttp app serving the catalogue with simulated network conditions:
+#   latency/jitter (seconds), error_rate (500s) and rate_429 (429 with
+#   Retry-After). `users` maps username → number of watched films.
+# Responses carry an ETag and honour If-None-Match like the real site.
+# ---------------------------------------
+class StandIn:
+    def __init__(self, users, latency=0.05, jitter=0.02, error_rate=0.0,
+                 rate_429=0.0, per_page=72, seed=0):
+        self.users = users
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.per_page = per_page
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.statuses = {}
+        self.runner = None
+
+    def films(self, username, list_type):
+        n = self.users.get(username.lower())
+        if n is None:
+            return None
+        if list_type == "watched":
+            return list(range(n, 0, -1))
+        # Half as long as the watched list, films the user hasn't seen
+        return list(range(n + n // 2, n, -1))
+
+    async def respond(self, request, body, status=200):
+        self.requests += 1
+        await asyncio.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+
+        roll = self.random.random()
+        if roll < self.rate_429:
+            status, body, headers = 429, b"Too Many Requests", {"Retry-After": "1"}
+        elif roll < self.rate_429 + self.error_rate:
+            status, body, headers = 500, b"Internal Server Error", {}
+        else:
+            headers = {"ETag": f'"{zlib.crc32(body):08x}"'}
+            if status == 200 and request.headers.get("If-None-Match") == headers["ETag"]:
+                status, body = 304, b""
+
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        return web.Response(body=body, status=status, headers=headers,
+                            content_type="text/html")
+
+    async def film(self, request):
+        slug = request.match_info["slug"]
+        try:
+            i = int(slug.rsplit("-", 1)[1])
+        except (IndexError, ValueError):
+            return await self.respond(request, ERROR_PAGE, 404)
+        return await self.respond(request, film_page(i))
+
+    async def user_list(self, request, list_type):
+        username = request.match_info["username"]
+        films = self.films(username, list_type)
+        if films is None:
+            return await self.respond(request, ERROR_PAGE, 404)
+        page = int(request.match_info.get("page", 1))
+        return await self.respond(
+            request, list_page(username, films, page, self.per_page)
+        )
+
+    async def watched(self, request):
+        return await self.user_list(request, "watched")
+
+    async def watchlist(self, request):
+        return await self.user_list(request, "watchlist")
+
+    def app(self):
+        app = web.Application()
+        app.add_routes([
+            web.get("/film/{slug}/", self.film),
+            web.get("/{username}/films/page/{page}/", self.watched),
+            web.get("/{username}/watchlist/page/{page}/", self.watchlist),
+        ])
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        self.runner = web.AppRunner(self.app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
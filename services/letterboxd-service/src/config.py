@@ -0,0 +1,110 @@
+import os
+
+# Letterboxd origin (overridable for local stand-ins)
+LETTERBOXD_BASE_URL = os.getenv("LETTERBOXD_BASE_URL", "https://letterboxd.com")
+
+# Shared HTTP connection pool
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+
+# Fetch retries (transport errors, 429 and 5xx) with exponential backoff
+FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", "3"))
+FETCH_BACKOFF_BASE = float(os.getenv("FETCH_BACKOFF_BASE", "0.5"))
+FETCH_BACKOFF_MAX = float(os.getenv("FETCH_BACKOFF_MAX", "8"))
+# Longest Retry-After we honour before giving up on the page
+RETRY_AFTER_MAX = float(os.getenv("RETRY_AFTER_MAX", "60"))
+# Circuit breaker: consecutive failures to open it, seconds before a probe
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "20"))
+BREAKER_RESET = float(os.getenv("BREAKER_RESET", "30"))
+# Hedged requests: re-issue a page still pending after the p95 latency
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "false").lower() in ("1", "true", "yes")
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.25"))
+
+# Service-wide budget for Letterboxd requests, shared fairly between
+# concurrent imports: token bucket (requests/second, 0 = no rate limit,
+# and burst size) plus a cap on requests in flight
+UPSTREAM_RATE = float(os.getenv("UPSTREAM_RATE", "50"))
+UPSTREAM_BURST = int(os.getenv("UPSTREAM_BURST", "50"))
+UPSTREAM_MAX_IN_FLIGHT = int(os.getenv("UPSTREAM_MAX_IN_FLIGHT", "20"))
+# Round-robin weights: imports a client waits on vs background jobs
+REQUEST_FLOW_WEIGHT = int(os.getenv("REQUEST_FLOW_WEIGHT", "2"))
+JOB_FLOW_WEIGHT = int(os.getenv("JOB_FLOW_WEIGHT", "1"))
+
+# How many page fetches one scrape keeps in flight
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "20"))
+# List pages after page 1 requested before the real page count is known
+SPECULATIVE_PAGES = int(os.getenv("SPECULATIVE_PAGES", "3"))
+
+# Overlapped list → lookup → scrape pipeline: slugs per Mongo lookup and
+# how many slugs may wait between stages before upstream stages pause
+PIPELINE_LOOKUP_CHUNK = int(os.getenv("PIPELINE_LOOKUP_CHUNK", "200"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "1000"))
+
+# Write-behind batching of slug → TMDB mapping upserts
+WRITE_BEHIND_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "500"))
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "1.0"))
+
+# Mapping table export/import (NDJSON): docs per cursor batch / bulk write
+MAPPING_DUMP_CHUNK = int(os.getenv("MAPPING_DUMP_CHUNK", "1000"))
+
+# In-process slug → TMDB cache (negative entries mark unresolvable slugs)
+MAPPING_CACHE_SIZE = int(os.getenv("MAPPING_CACHE_SIZE", "100000"))
+MAPPING_CACHE_TTL = float(os.getenv("MAPPING_CACHE_TTL", "86400"))
+NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", "259200"))
+
+# Memory-mapped slug → TMDB snapshot of letterboxd_ids shared by the
+# workers on a host ("" = off): rebuilt from Mongo when older than the
+# rebuild interval, and checked for a newer file every check interval
+SLUG_INDEX_PATH = os.getenv("SLUG_INDEX_PATH", "/tmp/letterboxd-slug-index/slugs.idx")
+SLUG_INDEX_REBUILD_INTERVAL = float(os.getenv("SLUG_INDEX_REBUILD_INTERVAL", "3600"))
+SLUG_INDEX_CHECK_INTERVAL = float(os.getenv("SLUG_INDEX_CHECK_INTERVAL", "30"))
+
+# HTML parsing executor: "process", "thread" or "inline" (on the event loop)
+PARSER_EXECUTOR = os.getenv("PARSER_EXECUTOR", "process")
+# Worker count; 0 = size to the container's CPU allowance
+PARSER_WORKERS = int(os.getenv("PARSER_WORKERS", "0"))
+
+# Incremental list sync: force a full re-scrape when the snapshot is older
+SNAPSHOT_FULL_SYNC_INTERVAL = float(os.getenv("SNAPSHOT_FULL_SYNC_INTERVAL", "86400"))
+
+# Resolved watched/watchlist results per user: served as-is while younger
+# than RESULT_CACHE_TTL, served stale (and refreshed in the background)
+# until RESULT_CACHE_MAX_STALE, after which Mongo drops them
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+RESULT_CACHE_MAX_STALE = int(os.getenv("RESULT_CACHE_MAX_STALE", "604800"))
+
+# On-disk HTTP page cache (compressed bodies + ETag/Last-Modified validators)
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", "/tmp/letterboxd-page-cache")
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Workers sharing PAGE_CACHE_DIR rescan it this often (seconds) to count
+# each other's files and evict down to PAGE_CACHE_MAX_BYTES
+PAGE_CACHE_SYNC_INTERVAL = float(os.getenv("PAGE_CACHE_SYNC_INTERVAL", "60"))
+# Serve without revalidating while younger than this (seconds)
+FILM_PAGE_MAX_AGE = float(os.getenv("FILM_PAGE_MAX_AGE", "604800"))
+LIST_PAGE_MAX_AGE = float(os.getenv("LIST_PAGE_MAX_AGE", "0"))
+
+# Most users one /letterboxd/batch request may ask for
+BATCH_MAX_USERS = int(os.getenv("BATCH_MAX_USERS", "20"))
+
+# Background import jobs
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# A running job whose heartbeat is older than this is considered abandoned
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+# How often each worker requeues abandoned jobs and picks up queued ones
+JOB_SWEEP_INTERVAL = float(os.getenv("JOB_SWEEP_INTERVAL", "60"))
+# Finished jobs are removed this long after they finish (TTL index)
+JOB_TTL = int(os.getenv("JOB_TTL", "86400"))
+# Slugs mapped per step; results and progress are saved after each step
+JOB_MAP_CHUNK = int(os.getenv("JOB_MAP_CHUNK", "200"))
+
+# Add a Server-Timing header (per-stage time of that request) to responses
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+
+# Shared directory for prometheus_client's multiprocess mode ("" = off):
+# with several uvicorn workers, /metrics then reports all of them summed
+# instead of whichever worker answered the scrape. Must be empty when the
+# workers start (the Dockerfile clears it).
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
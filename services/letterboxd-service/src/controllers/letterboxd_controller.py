@@ -1,116 +1,567 @@
-import subprocess
+import asyncio
+import itertools
 import json
+import logging
+from datetime import datetime, timezone
+
 from fastapi import HTTPException
 
+from src.config import (
+    BATCH_MAX_USERS,
+    JOB_FLOW_WEIGHT,
+    NEGATIVE_CACHE_TTL,
+    PIPELINE_LOOKUP_CHUNK,
+    PIPELINE_QUEUE_SIZE,
+    REQUEST_FLOW_WEIGHT,
+    RESULT_CACHE_MAX_STALE,
+    RESULT_CACHE_TTL,
+    SCRAPE_CONCURRENCY,
+    SNAPSHOT_FULL_SYNC_INTERVAL,
+)
+from src.controllers.letterboxd_db_controller import (
+    find_films,
+    find_unresolved,
+    get_pending_mappings,
+    get_result,
+    get_snapshot,
+    save_films,
+    save_result,
+    save_snapshot,
+    save_unresolved,
+    tmdb_id_of,
+)
+from src.database.cache import MISSING, mapping_cache
+from src.database.mapping_dump import export_mappings, import_mappings
 from src.database.mongo import letterboxd_collection
+from src.database.slug_index import slug_index
+from src.metrics import RESULT_CACHE, count_slugs, timed
+from src.scraper.films import scrape_films
+from src.scraper.lists import (
+    iter_user_pages,
+    open_list,
+    rating_of,
+    sync_list,
+)
+from src.scraper.scheduler import flow, set_flow
+from src.scraper.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Concurrent imports of the same user's list share one scrape
+list_flights = SingleFlight()
 
 
 # ----------------------------------------
-# Helper: run a Python script and parse JSON
+# Helper: await a scraper coroutine, surfacing failures as 500s
 # ----------------------------------------
-def run_script(script_path: str, args: list[str]):
+async def run_scraper(coro):
     try:
-        result = subprocess.run(
-            ["python3", script_path] + args,
-            capture_output=True,
-            text=True
-        )
-
-        if result.returncode != 0:
-            # stderr from the script is included in error
-            raise HTTPException(status_code=500, detail=result.stderr)
-
-        return json.loads(result.stdout)
-
+        return await coro
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ----------------------------------------
 # Mapping Letterboxd slug -> TMDB ID
+# Lookup tiers: in-process cache → write-behind buffer → shared slug index
+# → Mongo → scraper
 # Returns: dict { slug -> tmdbId }
 # ----------------------------------------
 async def map_letterboxd_to_tmdb(ids: list[str]) -> dict[str, int]:
     if not ids:
         return {}
 
-    # 1) Find all existing mappings in Mongo
-    cursor = letterboxd_collection.find({"_id": {"$in": ids}})
+    existing, missing = await lookup_mappings(ids)
 
+    # If any are missing, call the scraper
+    if missing:
+        films = await scrape_mappings(missing)
+        existing.update({slug: film["tmdbId"] for slug, film in films.items()})
+
+    # existing now has only valid slug -> tmdbId entries
+    return existing
+
+
+# Every tier but the scraper. Returns ({ slug -> tmdbId }, slugs to scrape);
+# slugs known to be unresolvable are in neither.
+async def lookup_mappings(ids: list[str]) -> tuple[dict[str, int], list[str]]:
+    ids = list(dict.fromkeys(ids))
     existing: dict[str, int] = {}
-    async for doc in cursor:
-        existing[doc["_id"]] = doc["tmdbId"]
+    lookup = []
 
-    # 2) Figure out which IDs are missing
-    missing = [slug for slug in ids if slug not in existing]
+    # 1) In-process cache (None = known to be unresolvable)
+    for slug in ids:
+        tmdb_id = mapping_cache.get(slug)
+        if tmdb_id is MISSING:
+            lookup.append(slug)
+        elif tmdb_id is not None:
+            existing[slug] = tmdb_id
 
-    # 3) If any are missing, call the scraper
-    if missing:
-        scraped_ids = run_script("src/scripts/letterboxd_tmdb.py", missing)
-        # scraped_ids is assumed to be aligned with `missing`
-
-        for slug, tmdb_id in zip(missing, scraped_ids):
-            if not tmdb_id:
-                # don’t store null/empty mappings
-                continue
-
-            await letterboxd_collection.update_one(
-                {"_id": slug},
-                {"$set": {"_id": slug, "tmdbId": tmdb_id}},
-                upsert=True,
+    count_slugs("cache", len(ids) - len(lookup))
+
+    # 2) Mappings scraped moments ago may not have been flushed to Mongo yet
+    pending = get_pending_mappings(lookup)
+    existing.update(pending)
+    lookup = [slug for slug in lookup if slug not in existing]
+    count_slugs("pending", len(pending))
+
+    # 3) The memory-mapped snapshot of letterboxd_ids the workers share
+    # (skipped while it predates an import that changed mappings)
+    if slug_index.current:
+        indexed = 0
+        for slug in lookup:
+            tmdb_id = slug_index.get(slug)
+            if tmdb_id is not None:
+                existing[slug] = tmdb_id
+                indexed += 1
+        if indexed:
+            lookup = [slug for slug in lookup if slug not in existing]
+        count_slugs("index", indexed)
+
+    # 4) Find all other existing mappings (and known misses) in Mongo
+    if lookup:
+        with timed("mongo_lookup"):
+            found = 0
+            cursor = letterboxd_collection.find({"_id": {"$in": lookup}}, {"tmdbId": 1})
+            async for doc in cursor:
+                tmdb_id = tmdb_id_of(doc)
+                existing[doc["_id"]] = tmdb_id
+                mapping_cache.set(doc["_id"], tmdb_id)
+                found += 1
+
+            unresolved = await find_unresolved(
+                [slug for slug in lookup if slug not in existing]
             )
-            existing[slug] = tmdb_id
+        for slug in unresolved:
+            mapping_cache.set(slug, None, ttl=NEGATIVE_CACHE_TTL)
+        count_slugs("mongo", found + len(unresolved))
+    else:
+        unresolved = set()
 
-    # existing now has only valid slug -> tmdbId entries
-    return existing
+    # 5) Figure out which IDs are missing
+    missing = [
+        slug for slug in lookup
+        if slug not in existing and slug not in unresolved
+    ]
+    return existing, missing
+
+
+# The scraper tier: resolves `missing`, caches and persists the outcome
+# (TMDB ID plus the film metadata read from the same page).
+# Returns { slug -> film } for the slugs that resolved.
+async def scrape_mappings(missing: list[str]) -> dict[str, dict]:
+    with timed("scrape_films"):
+        films = await run_scraper(scrape_films(missing))
+    # films is aligned with `missing`; don’t store null/empty mappings
+    scraped = {
+        slug: film
+        for slug, film in zip(missing, films)
+        if film and film["tmdbId"]
+    }
+    # "" = the page loaded but had no TMDB ID (None = fetch failed, retry later)
+    unresolvable = [
+        slug for slug, film in zip(missing, films)
+        if film is not None and film["tmdbId"] == ""
+    ]
+
+    count_slugs("scraped", len(scraped))
+    count_slugs("unresolvable", len(unresolvable))
+    count_slugs("failed", len(missing) - len(scraped) - len(unresolvable))
+
+    for slug, film in scraped.items():
+        mapping_cache.set(slug, film["tmdbId"])
+    for slug in unresolvable:
+        mapping_cache.set(slug, None, ttl=NEGATIVE_CACHE_TTL)
+
+    # Persisted by the write-behind batchers; the response doesn't wait
+    await save_films(scraped)
+    await save_unresolved(unresolvable)
+    return scraped
+
+
+# ----------------------------------------
+# Incremental list sync against the user's stored snapshot; falls back to
+# a full scrape on request or when the last full one is too old.
+# Returns compact [(slug, rated)] entries ([] if the user doesn't exist)
+# ----------------------------------------
+def age_seconds(when: datetime | None) -> float:
+    if when is None:
+        return float("inf")
+    if when.tzinfo is None:
+        # Mongo hands back naive UTC datetimes
+        when = when.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - when).total_seconds()
+
+
+async def sync_user_list(
+    username: str, list_type: str, full_sync: bool = False, on_page=None,
+    on_entries=None,
+):
+    snapshot = await get_snapshot(list_type, username)
+
+    if snapshot and age_seconds(snapshot.get("fullSyncAt")) > SNAPSHOT_FULL_SYNC_INTERVAL:
+        full_sync = True
+
+    result = await run_scraper(
+        sync_list(
+            username, list_type, None if full_sync else snapshot, on_page, on_entries
+        )
+    )
+    if result is None:
+        return []
+
+    now = datetime.now(timezone.utc)
+    fields = {"syncedAt": now}
+    if result.pop("full"):
+        fields["fullSyncAt"] = now
+    if not snapshot or result["entries"] != snapshot.get("entries"):
+        fields.update(result)
+    await save_snapshot(list_type, username, fields)
+
+    return [tuple(e) for e in result["entries"]]
+
+
+# ----------------------------------------
+# Mapped list entries → response records, in list order, skipping slugs
+# that didn’t map. watched: { movieId, rating }, watchlist: tmdbId
+# ----------------------------------------
+def to_records(list_type: str, entries, mapping: dict) -> list:
+    if list_type == "watchlist":
+        return [mapping[slug] for slug, _ in entries if slug in mapping]
+
+    return [
+        {"movieId": mapping[slug], "rating": rating_of(rated)}
+        for slug, rated in entries
+        if slug in mapping
+    ]
+
+
+# Records → parallel arrays (?format=columnar): watched gives
+# { movieIds, ratings }, watchlist { movieIds }
+def to_columns(list_type: str, records: list) -> dict:
+    if list_type == "watchlist":
+        return {"movieIds": records}
+    return {
+        "movieIds": [record["movieId"] for record in records],
+        "ratings": [record["rating"] for record in records],
+    }
+
+
+# ----------------------------------------
+# Sync a list and map it with the stages overlapped instead of one after
+# the other:
+#
+#   list pages ──▶ lookup (cache/Mongo, per chunk) ──▶ film page scrapers
+#
+# Slugs from each parsed page go to a lookup straight away, and its misses
+# to the scrapers while later pages are still downloading. The queues are
+# bounded, so a slow stage pauses the ones before it.
+# Returns (entries, { slug -> tmdbId })
+# ----------------------------------------
+_DONE = object()
+
+
+async def sync_and_map(username: str, list_type: str, full_sync: bool = False):
+    mapping: dict[str, int] = {}
+    seen: set[str] = set()
+    # Lookups queue whole chunks: bound it in slugs like the misses queue
+    lookups: asyncio.Queue = asyncio.Queue(max(1, PIPELINE_QUEUE_SIZE // PIPELINE_LOOKUP_CHUNK))
+    misses: asyncio.Queue = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+
+    async def feed(entries):
+        fresh = [slug for slug, _ in entries if slug not in seen]
+        seen.update(fresh)
+        for start in range(0, len(fresh), PIPELINE_LOOKUP_CHUNK):
+            await lookups.put(fresh[start:start + PIPELINE_LOOKUP_CHUNK])
+
+    async def produce():
+        entries = await sync_user_list(
+            username, list_type, full_sync, on_entries=feed
+        )
+        # Entries that didn't come from a fetched page (snapshot tail)
+        await feed(entries)
+        await lookups.put(_DONE)
+        return entries
+
+    async def lookup():
+        while (chunk := await lookups.get()) is not _DONE:
+            found, missing = await lookup_mappings(chunk)
+            mapping.update(found)
+            for slug in missing:
+                await misses.put(slug)
+        for _ in range(SCRAPE_CONCURRENCY):
+            await misses.put(_DONE)
+
+    async def scrape():
+        while (slug := await misses.get()) is not _DONE:
+            for slug, film in (await scrape_mappings([slug])).items():
+                mapping[slug] = film["tmdbId"]
+
+    tasks = [
+        asyncio.ensure_future(produce()),
+        asyncio.ensure_future(lookup()),
+        *(asyncio.ensure_future(scrape()) for _ in range(SCRAPE_CONCURRENCY)),
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    return tasks[0].result(), mapping
 
 
 # ----------------------------------------
 # WATCHLIST: returns TMDB IDs list (no nulls)
 # ----------------------------------------
-async def get_watchlist(username: str):
-    # script returns e.g.: ["speak-no-evil-2022", "the-last-duel-2021", ...]
-    slugs = run_script("src/scripts/letterboxd_watchlist.py", [username])
+async def get_watchlist(
+    username: str, full_sync: bool = False,
+    max_age: float | None = None, force_refresh: bool = False,
+):
+    return await get_list("watchlist", username, full_sync, max_age, force_refresh)
 
-    mapping = await map_letterboxd_to_tmdb(slugs)
 
-    # keep original order, skip slugs that didn’t map
-    tmdb_ids = [mapping[slug] for slug in slugs if slug in mapping]
-    return tmdb_ids
+async def resolve_watchlist(username: str, full_sync: bool = False):
+    # entries: [("speak-no-evil-2022", 0), ("the-last-duel-2021", 0), ...]
+    entries, mapping = await sync_and_map(username, "watchlist", full_sync)
+    return to_records("watchlist", entries, mapping)
 
 
 # ----------------------------------------
 # WATCHED MOVIES: returns [{ movieId, rating }]
 # ----------------------------------------
-async def get_watched_movies(username: str):
-    # script returns: [{ "movie_id": "...", "rating": 4 }, ...]
-    data = run_script("src/scripts/letterboxd_watched.py", [username])
+async def get_watched_movies(
+    username: str, full_sync: bool = False,
+    max_age: float | None = None, force_refresh: bool = False,
+):
+    return await get_list("watched", username, full_sync, max_age, force_refresh)
 
-    slugs = [item["movie_id"] for item in data]
-    mapping = await map_letterboxd_to_tmdb(slugs)
 
-    result = []
-    for item in data:
-        slug = item["movie_id"]
-        rating = item["rating"]
-        tmdb_id = mapping.get(slug)
+async def resolve_watched(username: str, full_sync: bool = False):
+    # entries: [("slug", rated-N), ...]
+    entries, mapping = await sync_and_map(username, "watched", full_sync)
+    return to_records("watched", entries, mapping)
 
-        if tmdb_id is None:
-            # skip unrsolved mappings
-            continue
 
-        result.append({
-            "movieId": tmdb_id,
-            "rating": rating,
-        })
+RESOLVERS = {"watched": resolve_watched, "watchlist": resolve_watchlist}
 
-    return result
+
+# ----------------------------------------
+# Per-user result cache. Without max_age it's stale-while-revalidate: a
+# result younger than RESULT_CACHE_TTL is returned as is, an older one is
+# still returned and a refresh starts in the background. An explicit
+# max_age is a hard bound: anything older is re-resolved before answering.
+# force_refresh and full_sync always re-resolve.
+# ----------------------------------------
+# Background refreshes in flight (held so they aren't garbage collected)
+_refreshes: set = set()
+
+
+async def get_list(
+    list_type: str, username: str, full_sync: bool = False,
+    max_age: float | None = None, force_refresh: bool = False,
+):
+    key = username.lower()
+
+    if force_refresh or full_sync:
+        RESULT_CACHE.labels("bypass").inc()
+    else:
+        cached = await get_result(list_type, username)
+        age = age_seconds(cached.get("resolvedAt")) if cached else float("inf")
+        if age <= (RESULT_CACHE_TTL if max_age is None else max_age):
+            RESULT_CACHE.labels("fresh").inc()
+            return cached["result"]
+
+        if max_age is None and age <= RESULT_CACHE_MAX_STALE:
+            RESULT_CACHE.labels("stale").inc()
+            if (list_type, key, False) not in list_flights:
+                # Nobody waits on it: a background job's share of the upstream
+                with flow(f"refresh:{list_type}:{key}", weight=JOB_FLOW_WEIGHT):
+                    task = asyncio.ensure_future(refresh_list(list_type, username))
+                _refreshes.add(task)
+                task.add_done_callback(_refresh_done)
+            return cached["result"]
+
+        RESULT_CACHE.labels("miss").inc()
+
+    with flow(f"user:{key}", weight=REQUEST_FLOW_WEIGHT):
+        return await refresh_list(list_type, username, full_sync)
+
+
+def _refresh_done(task: asyncio.Task):
+    _refreshes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("background refresh failed: %s", task.exception())
+
+
+# Resolve a list and store it as the cached result; concurrent calls for
+# the same list share one scrape
+async def refresh_list(list_type: str, username: str, full_sync: bool = False):
+    async def resolve():
+        result = await RESOLVERS[list_type](username, full_sync)
+        await save_result(list_type, username, result)
+        return result
+
+    return await list_flights.do((list_type, username.lower(), full_sync), resolve)
+
+
+# ----------------------------------------
+# BATCH (group sessions): several users' watched lists and watchlists,
+# synced concurrently and mapped in a single pass over the union of slugs.
+# Returns per-user lists plus, as TMDB IDs in first-seen order:
+#   watchlistUnion:        on anyone's watchlist
+#   watchlistIntersection: on everyone's watchlist
+#   unwatched:             on someone's watchlist, nobody has watched it
+# ----------------------------------------
+async def get_batch(usernames: list[str], full_sync: bool = False):
+    # Same user twice (any casing) is only scraped once
+    unique = {}
+    for name in usernames:
+        unique.setdefault(name.lower(), name)
+    usernames = list(unique.values())
+    if not usernames:
+        raise HTTPException(status_code=400, detail="usernames is required")
+    if len(usernames) > BATCH_MAX_USERS:
+        raise HTTPException(
+            status_code=400, detail=f"at most {BATCH_MAX_USERS} usernames per batch"
+        )
+
+    # The whole batch is one import to the upstream scheduler
+    with flow(f"batch:{','.join(unique)}", weight=REQUEST_FLOW_WEIGHT):
+        lists = await asyncio.gather(*(
+            sync_user_list(username, list_type, full_sync)
+            for username in usernames
+            for list_type in ("watched", "watchlist")
+        ))
+
+        mapping = await map_letterboxd_to_tmdb(
+            [slug for entries in lists for slug, _ in entries]
+        )
+
+    users = {}
+    watchlists = []
+    watched_ids = set()
+    for i, username in enumerate(usernames):
+        watched = to_records("watched", lists[2 * i], mapping)
+        watchlist = to_records("watchlist", lists[2 * i + 1], mapping)
+        users[username] = {"watched": watched, "watchlist": watchlist}
+
+        watchlists.append(watchlist)
+        watched_ids.update(record["movieId"] for record in watched)
+
+    union = list(dict.fromkeys(tmdb_id for watchlist in watchlists for tmdb_id in watchlist))
+    common = set.intersection(*(set(watchlist) for watchlist in watchlists))
+
+    return {
+        "users": users,
+        "watchlistUnion": union,
+        "watchlistIntersection": [tmdb_id for tmdb_id in union if tmdb_id in common],
+        "unwatched": [tmdb_id for tmdb_id in union if tmdb_id not in watched_ids],
+    }
 
 
 # ----------------------------------------
-# Manual mapping endpoint: ids -> tmdbIds (no nulls)
+# STREAMING: NDJSON, one line per list element, emitted page by page as
+# each page resolves (so lines arrive in page-completion order)
 # ----------------------------------------
-async def get_movie_ids(ids: list[str]):
-    mapping = await map_letterboxd_to_tmdb(ids)
+async def stream_list(username: str, list_type: str):
+    key = f"user:{username.lower()}"
+
+    # Fetch page 1 up front so errors still surface as HTTP errors; its
+    # entries become the first lines of the stream
+    with flow(key, weight=REQUEST_FLOW_WEIGHT):
+        first, num_pages, prefetched = await run_scraper(open_list(username, list_type))
+
+    async def lines():
+        if num_pages == -1:
+            return
+
+        # The rest is fetched while the response streams, in its own task
+        set_flow(key, weight=REQUEST_FLOW_WEIGHT)
+        async for _, entries in iter_user_pages(
+            username, list_type, num_pages, first, prefetched
+        ):
+            mapping = await map_letterboxd_to_tmdb([slug for slug, _ in entries])
+
+            chunk = "".join(
+                json.dumps(record) + "\n"
+                for record in to_records(list_type, entries, mapping)
+            )
+            if chunk:
+                yield chunk
+
+    return lines()
+
+
+async def stream_watched(username: str):
+    # line: { "movieId": ..., "rating": ... }
+    return await stream_list(username, "watched")
+
+
+async def stream_watchlist(username: str):
+    # line: tmdbId
+    return await stream_list(username, "watchlist")
+
+
+# ----------------------------------------
+# Manual mapping endpoint: ids -> tmdbIds (no nulls), or with details
+# [{ slug, tmdbId, imdbId, title, year, runtime, rating }]
+# Someone is waiting on these, so their fetches go ahead of bulk imports.
+# ----------------------------------------
+_map_calls = itertools.count()
+
+
+async def get_movie_ids(ids: list[str], details: bool = False):
+    with flow(f"map:{next(_map_calls)}", "interactive"):
+        mapping = await map_letterboxd_to_tmdb(ids)
+        if details:
+            return await get_film_details([slug for slug in ids if slug in mapping])
     # keep order, skip missing
     return [mapping[slug] for slug in ids if slug in mapping]
+
+
+FILM_FIELDS = ("tmdbId", "imdbId", "title", "year", "runtime", "rating")
+
+
+async def get_film_details(slugs: list[str]):
+    films = await find_films(list(dict.fromkeys(slugs)))
+
+    # Mapped before metadata was captured: read the film page again
+    stale = [slug for slug in dict.fromkeys(slugs) if "title" not in films.get(slug, {})]
+    if stale:
+        films.update(await scrape_mappings(stale))
+
+    return [
+        {"slug": slug, **{field: films.get(slug, {}).get(field) for field in FILM_FIELDS}}
+        for slug in slugs
+    ]
+
+
+# ----------------------------------------
+# Mapping table dump (seeding another environment): NDJSON export,
+# gzipped on request, and chunked import of such a dump
+# ----------------------------------------
+def export_mapping_table(compress: bool = False):
+    return export_mappings(compress)
+
+
+async def import_mapping_table(chunks, policy: str = "skip"):
+    def progress(stats):
+        logger.info("mapping import: %d lines read, %d upserted, %d modified",
+                    stats["read"], stats["upserted"], stats["modified"])
+
+    stats = await import_mappings(chunks, policy, on_progress=progress)
+    # Cached and indexed entries (negative ones too) may disagree with what
+    # was imported, in this worker and every other one
+    if stats["upserted"] or stats["modified"]:
+        await slug_index.mapping_table_changed()
+    return stats
+
+
+# ----------------------------------------
+# Slug cache statistics (size, hits, misses)
+# ----------------------------------------
+def get_cache_stats():
+    return {**mapping_cache.stats(), "slugIndex": slug_index.stats()}
@@ -1,5 +1,16 @@
-from src.database.mongo import letterboxd_collection
-from src.models.letterboxd.model import LetterboxdIdModel
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+from src.database.mongo import (
+    letterboxd_collection,
+    results_collection,
+    snapshots_collection,
+    unresolved_collection,
+)
+from src.database.write_behind import mapping_writer, unresolved_writer
+from src.metrics import MONGO_WRITES, timed
+from src.models.letterboxd_model import LetterboxdIdModel
 
 async def save_mapping(slug: str, movie_id: int):
     doc = {"_id": slug, "tmdbId": movie_id}
@@ -15,16 +26,104 @@ async def get_mapping(slug: str):
         return LetterboxdIdModel(**doc)
     return None
 
-async def bulk_save(slugs: list[str], ids: list[int]):
-    ops = []
-    for s, mid in zip(slugs, ids):
-        ops.append(
-            {"_id": s, "movieId": mid}
-        )
-    for doc in ops:
-        await letterboxd_collection.update_one(
-            {"_id": doc["_id"]},
-            {"$set": doc},
-            upsert=True
-        )
+async def bulk_save(films: dict[str, dict]):
+    ops = [
+        UpdateOne({"_id": slug}, {"$set": fields}, upsert=True)
+        for slug, fields in films.items()
+    ]
+    if ops:
+        with timed("mongo_write"):
+            await letterboxd_collection.bulk_write(ops, ordered=False)
+        MONGO_WRITES.labels(letterboxd_collection.name).inc(len(ops))
+    return True
+
+# Queue film docs ({ tmdbId, imdbId, title, year, runtime, rating }) on the
+# write-behind batcher when it's running (the app), otherwise write them
+# straight away in one bulk call (CLI / scripts)
+async def save_films(films: dict[str, dict]):
+    if not mapping_writer.running:
+        return await bulk_save(films)
+
+    for slug, fields in films.items():
+        mapping_writer.add(slug, fields)
+    return True
+
+# Mappings scraped moments ago that are still waiting in the write-behind buffer
+def get_pending_mappings(slugs: list[str]) -> dict[str, int]:
+    pending = {}
+    for slug in slugs:
+        fields = mapping_writer.get(slug)
+        if fields:
+            pending[slug] = fields["tmdbId"]
+    return pending
+
+# TMDB IDs are stored as ints; docs written before that hold digit strings
+def tmdb_id_of(doc: dict) -> int:
+    return int(doc["tmdbId"])
+
+# Film docs (without _id) for slugs, from the write-behind buffer or Mongo
+async def find_films(slugs: list[str]) -> dict[str, dict]:
+    films = {}
+    for slug in slugs:
+        fields = mapping_writer.get(slug)
+        if fields:
+            films[slug] = dict(fields)
+
+    rest = [slug for slug in slugs if slug not in films]
+    if rest:
+        cursor = letterboxd_collection.find({"_id": {"$in": rest}})
+        async for doc in cursor:
+            doc["tmdbId"] = tmdb_id_of(doc)
+            films[doc.pop("_id")] = doc
+    return films
+
+# Remember slugs whose film page has no TMDB ID (expired by a TTL index)
+async def save_unresolved(slugs: list[str]):
+    fields = {"unresolvedAt": datetime.now(timezone.utc)}
+
+    if not unresolved_writer.running:
+        if slugs:
+            await unresolved_collection.bulk_write(
+                [UpdateOne({"_id": s}, {"$set": fields}, upsert=True) for s in slugs],
+                ordered=False,
+            )
+        return True
+
+    for slug in slugs:
+        unresolved_writer.add(slug, fields)
     return True
+
+async def find_unresolved(slugs: list[str]) -> set[str]:
+    cursor = unresolved_collection.find({"_id": {"$in": slugs}}, {"_id": 1})
+    return {doc["_id"] async for doc in cursor}
+
+# Per-user list snapshots ({ entries, pageFingerprints, perPage, syncedAt, fullSyncAt })
+async def get_snapshot(list_type: str, username: str):
+    return await snapshots_collection.find_one({"_id": f"{list_type}:{username.lower()}"})
+
+async def save_snapshot(list_type: str, username: str, fields: dict):
+    await snapshots_collection.update_one(
+        {"_id": f"{list_type}:{username.lower()}"},
+        {"$set": fields},
+        upsert=True,
+    )
+
+# Per-user resolved results ({ result, resolvedAt, format }). Results saved
+# in an older format (string TMDB IDs before 2) read as missing.
+RESULT_FORMAT = 2
+
+async def get_result(list_type: str, username: str):
+    return await results_collection.find_one(
+        {"_id": f"{list_type}:{username.lower()}", "format": RESULT_FORMAT}
+    )
+
+async def save_result(list_type: str, username: str, result: list):
+    await results_collection.update_one(
+        {"_id": f"{list_type}:{username.lower()}"},
+        {"$set": {
+            "result": result,
+            "resolvedAt": datetime.now(timezone.utc),
+            "format": RESULT_FORMAT,
+        }},
+        upsert=True,
+    )
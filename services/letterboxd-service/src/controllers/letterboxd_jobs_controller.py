@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+
+from src.config import (
+    JOB_FLOW_WEIGHT,
+    JOB_LEASE_SECONDS,
+    JOB_MAP_CHUNK,
+    JOB_SWEEP_INTERVAL,
+    JOB_WORKERS,
+)
+from src.controllers.letterboxd_controller import (
+    map_letterboxd_to_tmdb,
+    sync_user_list,
+    to_columns,
+    to_records,
+)
+from src.controllers.letterboxd_db_controller import save_result
+from src.database.mongo import jobs_collection
+from src.jobs.worker_pool import PriorityWorkerPool
+from src.scraper.scheduler import flow
+
+logger = logging.getLogger(__name__)
+
+LIST_TYPES = ("watched", "watchlist")
+
+# Progress is written to Mongo at most this often while pages are fetched
+PROGRESS_INTERVAL = 1.0
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+# Running jobs with a heartbeat before this have lost their worker
+def lease_cutoff():
+    return utcnow() - timedelta(seconds=JOB_LEASE_SECONDS)
+
+
+# ----------------------------------------
+# Create a job: returns { jobId, status }. An identical job that is still
+# queued or running (with a live heartbeat) is reused instead of starting
+# another scrape.
+# ----------------------------------------
+async def create_job(username: str, list_type: str, priority: int = 10,
+                     full_sync: bool = False):
+    if not username:
+        raise HTTPException(status_code=400, detail="username is required")
+    if list_type not in LIST_TYPES:
+        raise HTTPException(status_code=400, detail=f"type must be one of {LIST_TYPES}")
+
+    existing = await jobs_collection.find_one({
+        "usernameKey": username.lower(),
+        "listType": list_type,
+        "$or": [
+            {"status": "queued"},
+            {"status": "running", "heartbeatAt": {"$gte": lease_cutoff()}},
+        ],
+    })
+    if existing:
+        return {"jobId": existing["_id"], "status": existing["status"]}
+
+    job = {
+        "_id": uuid.uuid4().hex,
+        "username": username,
+        "usernameKey": username.lower(),
+        "listType": list_type,
+        "priority": priority,
+        "fullSync": full_sync,
+        "status": "queued",
+        "createdAt": utcnow(),
+        "progress": {"pagesDone": 0, "pagesTotal": None,
+                     "slugsTotal": None, "slugsDone": 0, "slugsResolved": 0},
+        "result": [],
+        "error": None,
+    }
+    await jobs_collection.insert_one(job)
+    job_pool.submit(job["_id"], priority)
+
+    return {"jobId": job["_id"], "status": "queued"}
+
+
+# ----------------------------------------
+# Job state: status, progress and (partial) result, as parallel arrays
+# with `columnar` (see to_columns)
+# ----------------------------------------
+async def get_job(job_id: str, columnar: bool = False):
+    job = await jobs_collection.find_one({"_id": job_id})
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if columnar and job.get("result") is not None:
+        job["result"] = to_columns(job["listType"], job["result"])
+    job["jobId"] = job.pop("_id")
+    job.pop("usernameKey", None)
+    job.pop("heartbeatAt", None)
+    return job
+
+
+# ----------------------------------------
+# Page progress reported by the scraper; flushed to Mongo in the background
+# (at most every PROGRESS_INTERVAL seconds) so fetching never waits on it
+# ----------------------------------------
+class JobProgress:
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._last_flush = 0.0
+        self._flush_task: asyncio.Task | None = None
+
+    def page(self, pages_done: int, pages_total: int):
+        now = time.monotonic()
+        if now - self._last_flush < PROGRESS_INTERVAL and pages_done < pages_total:
+            return
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+
+        self._last_flush = now
+        self._flush_task = asyncio.create_task(jobs_collection.update_one(
+            {"_id": self.job_id},
+            {"$set": {
+                "progress.pagesDone": pages_done,
+                "progress.pagesTotal": pages_total,
+                "heartbeatAt": utcnow(),
+            }},
+        ))
+
+
+# ----------------------------------------
+# Worker: claim a queued job, sync the list, then map it chunk by chunk,
+# appending each chunk's records to the job as partial results
+# ----------------------------------------
+async def run_job(job_id: str):
+    job = await jobs_collection.find_one_and_update(
+        {"_id": job_id, "status": "queued"},
+        {"$set": {"status": "running", "startedAt": utcnow(), "heartbeatAt": utcnow()}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if job is None:
+        # Claimed by another worker, or gone
+        return
+
+    list_type = job["listType"]
+    progress = JobProgress(job_id)
+
+    # Background imports get a smaller share of the upstream than requests
+    with flow(f"job:{job_id}", weight=JOB_FLOW_WEIGHT):
+        try:
+            entries = await sync_user_list(
+                job["username"], list_type, job["fullSync"], on_page=progress.page
+            )
+            await jobs_collection.update_one(
+                {"_id": job_id},
+                {"$set": {"progress.slugsTotal": len(entries), "result": []}},
+            )
+
+            result = []
+            for start in range(0, len(entries), JOB_MAP_CHUNK):
+                chunk = entries[start:start + JOB_MAP_CHUNK]
+                mapping = await map_letterboxd_to_tmdb([slug for slug, _ in chunk])
+                records = to_records(list_type, chunk, mapping)
+                result += records
+
+                await jobs_collection.update_one(
+                    {"_id": job_id},
+                    {
+                        "$push": {"result": {"$each": records}},
+                        "$set": {
+                            "progress.slugsDone": start + len(chunk),
+                            "progress.slugsResolved": len(result),
+                            "heartbeatAt": utcnow(),
+                        },
+                    },
+                )
+
+            # Later reads of this list are served from the result cache
+            await save_result(list_type, job["username"], result)
+            await jobs_collection.update_one(
+                {"_id": job_id},
+                {"$set": {"status": "done", "finishedAt": utcnow()}},
+            )
+
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back so it's picked up again
+            await jobs_collection.update_one(
+                {"_id": job_id}, {"$set": {"status": "queued"}}
+            )
+            raise
+
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            await jobs_collection.update_one(
+                {"_id": job_id},
+                {"$set": {"status": "failed", "error": detail, "finishedAt": utcnow()}},
+            )
+
+
+job_pool = PriorityWorkerPool(run_job, JOB_WORKERS)
+
+
+# ----------------------------------------
+# Sweep: requeue running jobs whose worker went away (heartbeat older than
+# the lease) and submit every queued job to this worker's pool, most
+# urgent first. Runs at startup and every JOB_SWEEP_INTERVAL, so a job
+# left behind by a dead worker is picked up by the others. Claiming a job
+# is atomic (run_job), so several workers submitting it is harmless.
+# ----------------------------------------
+_sweep_task: asyncio.Task | None = None
+
+
+async def recover_jobs():
+    cutoff = lease_cutoff()
+    cursor = jobs_collection.find(
+        {"status": "running", "heartbeatAt": {"$lt": cutoff}}, {"_id": 1}
+    )
+    async for job in cursor:
+        # Still running here, just quiet: don't let another worker take it
+        if job["_id"] in job_pool.active:
+            continue
+        await jobs_collection.update_one(
+            {"_id": job["_id"], "status": "running", "heartbeatAt": {"$lt": cutoff}},
+            {"$set": {"status": "queued"}},
+        )
+
+    cursor = jobs_collection.find(
+        {"status": "queued"}, {"_id": 1, "priority": 1}
+    ).sort("priority", 1)
+    async for job in cursor:
+        job_pool.submit(job["_id"], job.get("priority", 10))
+
+
+async def sweep_jobs():
+    while True:
+        try:
+            await recover_jobs()
+        except Exception as e:
+            logger.warning("job sweep failed: %s", e)
+        await asyncio.sleep(JOB_SWEEP_INTERVAL)
+
+
+async def start_jobs():
+    global _sweep_task
+    await job_pool.start()
+    _sweep_task = asyncio.create_task(sweep_jobs())
+
+
+# Running jobs are cancelled and put back in the queue for the next start
+async def stop_jobs():
+    global _sweep_task
+    if _sweep_task is not None:
+        _sweep_task.cancel()
+        await asyncio.gather(_sweep_task, return_exceptions=True)
+        _sweep_task = None
+    await job_pool.stop()
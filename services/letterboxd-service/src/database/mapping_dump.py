@@ -0,0 +1,178 @@
+import asyncio
+import json
+import zlib
+
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from src.config import MAPPING_DUMP_CHUNK
+from src.database.mongo import letterboxd_collection
+from src.metrics import MONGO_WRITES
+
+# Fields a dump line may carry besides the slug
+FIELDS = ("tmdbId", "imdbId", "title", "year", "runtime", "rating")
+
+# What an imported line does to a slug that's already mapped:
+#   skip:      keep the existing doc
+#   overwrite: set the line's fields, keep the others
+#   replace:   replace the doc with the line
+POLICIES = ("skip", "overwrite", "replace")
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Export output is yielded in pieces of about this many bytes
+EXPORT_PIECE = 64 * 1024
+
+
+# ---------------------------------------
+# Export: the mapping table as NDJSON, one
+# { "slug", "tmdbId", "imdbId", "title", ... } per line, in slug order.
+# Streams from a cursor, gzipped on the fly when `compress` is set.
+# ---------------------------------------
+async def export_mappings(compress: bool = False):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    lines = []
+    size = 0
+
+    def piece():
+        data = "".join(lines).encode()
+        lines.clear()
+        return compressor.compress(data) if compressor else data
+
+    cursor = letterboxd_collection.find({}).sort("_id", 1).batch_size(MAPPING_DUMP_CHUNK)
+    async for doc in cursor:
+        line = json.dumps({"slug": doc.pop("_id"), **doc}, separators=(",", ":")) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= EXPORT_PIECE:
+            size = 0
+            data = piece()
+            if data:
+                yield data
+
+    data = piece()
+    if compressor:
+        data += compressor.flush()
+    if data:
+        yield data
+
+
+# ---------------------------------------
+# Import: NDJSON lines (plain or gzip, detected from the first bytes) from
+# an async iterator of byte chunks, written in chunks of
+# MAPPING_DUMP_CHUNK unordered bulk upserts. One chunk is parsed while the
+# previous one is written, so memory stays at about two chunks.
+#
+# Returns { read, invalid, upserted, modified, matched, failed };
+# on_progress(stats) is called after each chunk is written.
+# ---------------------------------------
+async def iter_lines(chunks):
+    decompressor = None
+    head = b""
+    rest = b""
+
+    async for chunk in chunks:
+        if head is not None:
+            head += chunk
+            if len(head) < len(GZIP_MAGIC):
+                continue
+            if head.startswith(GZIP_MAGIC):
+                decompressor = zlib.decompressobj(31)
+            chunk, head = head, None
+
+        rest += decompressor.decompress(chunk) if decompressor else chunk
+        *lines, rest = rest.split(b"\n")
+        for line in lines:
+            yield line
+
+    if head:
+        rest = head
+    if decompressor:
+        rest += decompressor.flush()
+    for line in rest.split(b"\n"):
+        yield line
+
+
+def import_op(line: bytes, policy: str):
+    try:
+        doc = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(doc, dict):
+        return None
+
+    slug = doc.get("slug", doc.get("_id"))
+    if not isinstance(slug, str) or not slug:
+        return None
+    # Stored as an int; older exports have digit strings
+    try:
+        tmdb_id = int(doc.get("tmdbId"))
+    except (TypeError, ValueError):
+        return None
+    if tmdb_id <= 0:
+        return None
+
+    fields = {field: doc[field] for field in FIELDS if field in doc}
+    fields["tmdbId"] = tmdb_id
+
+    if policy == "replace":
+        return ReplaceOne({"_id": slug}, fields, upsert=True)
+    if policy == "overwrite":
+        return UpdateOne({"_id": slug}, {"$set": fields}, upsert=True)
+    return UpdateOne({"_id": slug}, {"$setOnInsert": fields}, upsert=True)
+
+
+async def _write(ops, stats):
+    try:
+        result = await letterboxd_collection.bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        # Unordered: the rest of the chunk was still written
+        details = e.details
+        stats["failed"] += len(details.get("writeErrors", []))
+        counts = details.get("nUpserted", 0), details.get("nModified", 0), details.get("nMatched", 0)
+    else:
+        counts = result.upserted_count, result.modified_count, result.matched_count
+
+    for key, n in zip(("upserted", "modified", "matched"), counts):
+        stats[key] += n
+    MONGO_WRITES.labels(letterboxd_collection.name).inc(len(ops))
+
+
+async def import_mappings(chunks, policy: str = "skip", on_progress=None):
+    stats = {"read": 0, "invalid": 0, "upserted": 0, "modified": 0,
+             "matched": 0, "failed": 0}
+    ops = []
+    writing = None
+
+    async def write(ops):
+        nonlocal writing
+        if writing is not None:
+            await writing
+        writing = asyncio.ensure_future(_write(ops, stats))
+        if on_progress:
+            writing.add_done_callback(lambda _: on_progress(stats))
+
+    try:
+        async for line in iter_lines(chunks):
+            if not line.strip():
+                continue
+            stats["read"] += 1
+            op = import_op(line, policy)
+            if op is None:
+                stats["invalid"] += 1
+                continue
+
+            ops.append(op)
+            if len(ops) >= MAPPING_DUMP_CHUNK:
+                await write(ops)
+                ops = []
+
+        if ops:
+            await write(ops)
+        if writing is not None:
+            await writing
+    finally:
+        if writing is not None and not writing.done():
+            writing.cancel()
+
+    return stats
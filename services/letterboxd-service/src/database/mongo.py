@@ -1,6 +1,8 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 
+from src.config import JOB_TTL, NEGATIVE_CACHE_TTL, RESULT_CACHE_MAX_STALE
+
 # Mongo connection URL (replace if needed)
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://letterboxd-db:27017")
 
@@ -15,3 +17,30 @@ db = client[DB_NAME]
 
 # Access collection
 letterboxd_collection = db["letterboxd_ids"]
+
+# Slugs whose film page had no TMDB ID (expire via TTL index)
+unresolved_collection = db["letterboxd_unresolved"]
+
+# Per-user list snapshots for incremental sync ("<listType>:<username>")
+snapshots_collection = db["letterboxd_snapshots"]
+
+# Resolved watched/watchlist results per user ("<listType>:<username>")
+results_collection = db["letterboxd_results"]
+
+# Background import jobs (state, progress and partial results)
+jobs_collection = db["letterboxd_jobs"]
+
+# Service-wide markers ("mappings": generation of the mapping table, bumped
+# by imports that change existing mappings)
+meta_collection = db["letterboxd_meta"]
+
+
+async def ensure_indexes():
+    await unresolved_collection.create_index(
+        "unresolvedAt", expireAfterSeconds=NEGATIVE_CACHE_TTL
+    )
+    await results_collection.create_index(
+        "resolvedAt", expireAfterSeconds=RESULT_CACHE_MAX_STALE
+    )
+    await jobs_collection.create_index("finishedAt", expireAfterSeconds=JOB_TTL)
+    await jobs_collection.create_index([("status", 1), ("priority", 1)])
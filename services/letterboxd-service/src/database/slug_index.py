@@ -0,0 +1,299 @@
+import asyncio
+import bisect
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import time
+from array import array
+
+from pymongo import ReturnDocument
+
+from src.config import (
+    SLUG_INDEX_CHECK_INTERVAL,
+    SLUG_INDEX_PATH,
+    SLUG_INDEX_REBUILD_INTERVAL,
+)
+from src.database.cache import mapping_cache
+from src.database.mongo import letterboxd_collection, meta_collection
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------
+# On-disk snapshot of letterboxd_ids (slug → TMDB ID), in native byte
+# order (it never leaves the host that built it):
+#
+#   header   magic "LBSI", version, count, generation       (4 × u32)
+#   offsets  count + 1 × u32, slug i is blob[off[i]:off[i + 1]]
+#   ids      count × i32, TMDB ID of slug i
+#   blob     the UTF-8 slugs, sorted bytewise, back to back
+#
+# Readers mmap it read-only, so every uvicorn worker on the host shares
+# one copy through the page cache, and a restarted worker is warm as soon
+# as it has opened the file.
+#
+# `generation` is the mapping table's generation (letterboxd_meta) when
+# the snapshot was read. An import that changes existing mappings bumps
+# it; until a snapshot at least that new is written, the index is skipped.
+# ----------------------------------------
+MAGIC = b"LBSI"
+# Every FENCE_STEP-th slug is kept in a list, so the search narrows to one
+# block with C bisect before touching the map
+FENCE_STEP = 64
+VERSION = 2
+HEADER = struct.Struct("=4sIII")
+
+
+def write_slug_index(path: str, entries: list[tuple[bytes, int]], generation: int = 0):
+    entries.sort()
+    offsets = [0]
+    for slug, _ in entries:
+        offsets.append(offsets[-1] + len(slug))
+
+    # Written beside the old one and swapped in: readers never see half a file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(entries), generation))
+        f.write(array("I", offsets).tobytes())
+        f.write(array("i", (tmdb_id for _, tmdb_id in entries)).tobytes())
+        for slug, _ in entries:
+            f.write(slug)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# Every mapped slug with a numeric TMDB ID → (slug bytes, id)
+async def read_mappings() -> list[tuple[bytes, int]]:
+    entries = []
+    cursor = letterboxd_collection.find(
+        {"tmdbId": {"$exists": True}}, {"tmdbId": 1}
+    ).batch_size(10000)
+    async for doc in cursor:
+        try:
+            tmdb_id = int(doc["tmdbId"])
+        except (TypeError, ValueError):
+            continue
+        if 0 < tmdb_id < 2 ** 31:
+            entries.append((doc["_id"].encode(), tmdb_id))
+    return entries
+
+
+async def mapping_generation() -> int:
+    doc = await meta_collection.find_one({"_id": "mappings"})
+    return doc["generation"] if doc else 0
+
+
+async def bump_mapping_generation() -> int:
+    doc = await meta_collection.find_one_and_update(
+        {"_id": "mappings"}, {"$inc": {"generation": 1}},
+        upsert=True, return_document=ReturnDocument.AFTER,
+    )
+    return doc["generation"]
+
+
+class SlugIndex:
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self.hits = 0
+        self.misses = 0
+        # Mapping table generation last seen, and the open snapshot's
+        self.generation = 0
+        self.file_generation = 0
+        self._mm: mmap.mmap | None = None
+        self._file_id = None
+        # Views into the map: offsets (u32) and ids (i32) columns, slug bytes
+        self._offsets: memoryview | None = None
+        self._ids: memoryview | None = None
+        self._fence: list[bytes] = []
+        self._blob_at = 0
+        self._task: asyncio.Task | None = None
+        self._rebuilding: asyncio.Task | None = None
+
+    @property
+    def loaded(self):
+        return self._mm is not None
+
+    # Loaded, and not older than the last change to the mapping table
+    @property
+    def current(self):
+        return self._mm is not None and self.file_generation >= self.generation
+
+    # ----------------------------------------
+    # (Re)open the file if it changed since it was last mapped
+    # ----------------------------------------
+    def reload(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if file_id == self._file_id:
+            return False
+
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, generation = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION:
+            mm.close()
+            logger.warning("ignoring slug index %s: unknown format", self.path)
+            return False
+
+        self.close()
+        ids_at = HEADER.size + (count + 1) * 4
+        self._mm = mm
+        self._offsets = memoryview(mm)[HEADER.size:ids_at].cast("I")
+        self._ids = memoryview(mm)[ids_at:ids_at + count * 4].cast("i")
+        self._blob_at = ids_at + count * 4
+        self.count = count
+        self.file_generation = generation
+        self._fence = [self._slug(i) for i in range(0, count, FENCE_STEP)]
+        self._file_id = file_id
+        return True
+
+    def close(self):
+        if self._mm is not None:
+            # The views must go before the map can be closed
+            self._offsets.release()
+            self._ids.release()
+            self._mm.close()
+        self._mm = self._offsets = self._ids = None
+        self._fence = []
+        self._file_id = None
+        self.count = 0
+        self.file_generation = 0
+
+    def _slug(self, i: int) -> bytes:
+        start = self._blob_at + self._offsets[i]
+        return self._mm[start:self._blob_at + self._offsets[i + 1]]
+
+    # Binary search → TMDB ID, or None if the slug isn't in the snapshot
+    def get(self, slug: str) -> int | None:
+        if self._mm is None:
+            return None
+        key = slug.encode()
+        # Slugs in fence block b are [b * FENCE_STEP, (b + 1) * FENCE_STEP)
+        block = bisect.bisect_right(self._fence, key) - 1
+        if block < 0:
+            self.misses += 1
+            return None
+        mm, offsets, base = self._mm, self._offsets, self._blob_at
+        lo = block * FENCE_STEP
+        hi = min(lo + FENCE_STEP, self.count)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if mm[base + offsets[mid]:base + offsets[mid + 1]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and mm[base + offsets[lo]:base + offsets[lo + 1]] == key:
+            self.hits += 1
+            return self._ids[lo]
+        self.misses += 1
+        return None
+
+    def stats(self):
+        return {"loaded": self.loaded, "current": self.current, "size": self.count,
+                "generation": self.file_generation,
+                "hits": self.hits, "misses": self.misses}
+
+    # ----------------------------------------
+    # Rebuild from Mongo when the file is older than
+    # SLUG_INDEX_REBUILD_INTERVAL or than the mapping table's generation.
+    # A lock file makes one worker on the host do it; the others pick the
+    # new file up on their next check.
+    # ----------------------------------------
+    def _age(self):
+        try:
+            return time.time() - os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return float("inf")
+
+    # (not loaded: missing, or written in an older format)
+    def _stale(self):
+        return (not self.loaded or self._age() >= SLUG_INDEX_REBUILD_INTERVAL
+                or self.file_generation < self.generation)
+
+    async def rebuild(self) -> bool:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.lock", "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            # Another worker may have just finished one
+            self.reload()
+            if not self._stale():
+                return False
+
+            # Read before the mappings, so the file never claims a newer one
+            generation = await mapping_generation()
+            entries = await read_mappings()
+            await asyncio.to_thread(write_slug_index, self.path, entries, generation)
+            logger.info("slug index rebuilt: %d slugs, generation %d",
+                        len(entries), generation)
+        self.reload()
+        return True
+
+    # ----------------------------------------
+    # Track the mapping table's generation. A newer one means an import
+    # changed mappings this worker may have cached or indexed: drop the
+    # cache, and skip the index until a snapshot that new is written.
+    # ----------------------------------------
+    def _observe(self, generation: int):
+        if generation > self.generation:
+            self.generation = generation
+            mapping_cache.clear()
+
+    async def check_generation(self):
+        self._observe(await mapping_generation())
+
+    # After an import changed the mapping table: tell the other workers
+    # and rebuild now instead of at the next interval
+    async def mapping_table_changed(self):
+        self._observe(await bump_mapping_generation())
+        if self.path and (self._rebuilding is None or self._rebuilding.done()):
+            self._rebuilding = asyncio.create_task(self._rebuild_logged())
+
+    async def _rebuild_logged(self):
+        try:
+            await self.rebuild()
+        except Exception as e:
+            logger.warning("slug index rebuild failed: %s", e)
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            if self.path:
+                # An existing snapshot is usable straight away
+                self.reload()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        for task in (self._task, self._rebuilding):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._rebuilding = None
+        self.close()
+
+    # Also runs with the index off: the generation check keeps the
+    # in-process cache honest after imports on other workers
+    async def _run(self):
+        while True:
+            try:
+                await self.check_generation()
+                if self.path:
+                    self.reload()
+                    if self._stale():
+                        await self.rebuild()
+            except Exception as e:
+                logger.warning("slug index refresh failed: %s", e)
+            await asyncio.sleep(SLUG_INDEX_CHECK_INTERVAL)
+
+
+slug_index = SlugIndex(SLUG_INDEX_PATH)
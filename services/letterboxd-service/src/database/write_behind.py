@@ -0,0 +1,96 @@
+import asyncio
+import logging
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from src.config import WRITE_BEHIND_FLUSH_INTERVAL, WRITE_BEHIND_MAX_BATCH
+from src.database.mongo import letterboxd_collection, unresolved_collection
+from src.metrics import MONGO_WRITES, timed
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------
+# Buffers upserts ($set fields keyed by _id) and writes them as unordered
+# bulk_write batches, either when `max_batch` are pending or every
+# `flush_interval` seconds. Upserts for the same _id coalesce in the buffer.
+# ----------------------------------------
+class WriteBehindBatcher:
+    def __init__(self, collection, max_batch=WRITE_BEHIND_MAX_BATCH,
+                 flush_interval=WRITE_BEHIND_FLUSH_INTERVAL):
+        self.collection = collection
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._pending: dict[str, dict] = {}
+        self._inflight: dict[str, dict] = {}
+        self._wake: asyncio.Event | None = None
+        self._lock: asyncio.Lock | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def add(self, _id, fields: dict):
+        self._pending[_id] = {**self._pending.get(_id, {}), **fields}
+        if len(self._pending) >= self.max_batch and self._wake is not None:
+            self._wake.set()
+
+    # Read-your-writes: fields not yet durable in Mongo (None if nothing pending)
+    def get(self, _id):
+        return self._pending.get(_id) or self._inflight.get(_id)
+
+    async def start(self):
+        if not self.running:
+            # Created here so they bind to the loop the app runs on
+            self._wake = asyncio.Event()
+            self._lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while self._pending:
+                ids = list(self._pending)[:self.max_batch]
+                self._inflight = {_id: self._pending.pop(_id) for _id in ids}
+                ops = [
+                    UpdateOne({"_id": _id}, {"$set": fields}, upsert=True)
+                    for _id, fields in self._inflight.items()
+                ]
+                try:
+                    with timed("mongo_write"):
+                        await self.collection.bulk_write(ops, ordered=False)
+                    MONGO_WRITES.labels(self.collection.name).inc(len(ops))
+                except PyMongoError as e:
+                    # Keep the batch for the next flush; newer values win
+                    logger.warning("write-behind flush of %d docs failed: %s", len(ops), e)
+                    for _id, fields in self._inflight.items():
+                        self._pending[_id] = {**fields, **self._pending.get(_id, {})}
+                    self._inflight = {}
+                    return
+                self._inflight = {}
+
+
+mapping_writer = WriteBehindBatcher(letterboxd_collection)
+unresolved_writer = WriteBehindBatcher(unresolved_collection)
@@ -0,0 +1,61 @@
+import asyncio
+import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------
+# Fixed number of worker tasks pulling ids off a priority queue and
+# running `handler(id)` on each. Lower priority values run first; equal
+# priorities run in submission order. An id already waiting or running is
+# not queued again.
+# ----------------------------------------
+class PriorityWorkerPool:
+    def __init__(self, handler, workers: int):
+        self.handler = handler
+        self.workers = workers
+        self._queue: asyncio.PriorityQueue | None = None
+        self._seq = itertools.count()
+        self._tasks: list[asyncio.Task] = []
+        self._waiting: set = set()
+        self.active: set = set()
+
+    @property
+    def running(self):
+        return bool(self._tasks)
+
+    def submit(self, item_id, priority: int = 0):
+        if self._queue is None:
+            raise RuntimeError("worker pool is not running")
+        if item_id in self._waiting or item_id in self.active:
+            return
+        self._waiting.add(item_id)
+        self._queue.put_nowait((priority, next(self._seq), item_id))
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._waiting.clear()
+
+    async def _work(self):
+        while True:
+            _, _, item_id = await self._queue.get()
+            self._waiting.discard(item_id)
+            self.active.add(item_id)
+            try:
+                await self.handler(item_id)
+            except Exception:
+                logger.exception("worker pool handler failed for %s", item_id)
+            finally:
+                self.active.discard(item_id)
+                self._queue.task_done()
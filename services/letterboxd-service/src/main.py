@@ -1,10 +1,82 @@
-from fastapi import FastAPI
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
+from src.config import PROMETHEUS_MULTIPROC_DIR, SERVER_TIMING
+from src.controllers.letterboxd_jobs_controller import start_jobs, stop_jobs
+from src.database.mongo import ensure_indexes
+from src.database.slug_index import slug_index
+from src.database.write_behind import mapping_writer, unresolved_writer
+from src.metrics import REQUEST_SECONDS, server_timing, start_request_stats
 from src.routes.letterboxd import router as letterboxd_router
+from src.scraper.http import close_session, start_session
+from src.scraper.page_cache import page_cache
+from src.scraper.parser_pool import shutdown_parser_pool, start_parser_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ensure_indexes()
+    # Map the shared slug → TMDB snapshot (and keep it rebuilt/reloaded)
+    await slug_index.start()
+    # One keep-alive HTTP pool for every Letterboxd fetch in this worker
+    await start_session()
+    # Index the on-disk page cache now rather than on the first request
+    await asyncio.to_thread(page_cache.load)
+    # HTML parsing runs on a process pool sized to the container's CPUs
+    start_parser_pool()
+    # Batch mapping upserts; stop() flushes whatever is still buffered
+    await mapping_writer.start()
+    await unresolved_writer.start()
+    # Background import jobs (and any left over from the last run)
+    await start_jobs()
+    yield
+    await stop_jobs()
+    await unresolved_writer.stop()
+    await mapping_writer.stop()
+    await close_session()
+    shutdown_parser_pool()
+    await slug_index.stop()
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
 
-app = FastAPI(title="Letterboxd Service")
+
+app = FastAPI(title="Letterboxd Service", lifespan=lifespan)
 
 app.include_router(letterboxd_router)
 
+
+# Request latency per route, plus a Server-Timing breakdown of the stages
+# the request ran (for streams: only what ran before the first byte)
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    stats = start_request_stats()
+    start = time.perf_counter()
+    response = await call_next(request)
+
+    route = request.scope.get("route")
+    REQUEST_SECONDS.labels(
+        request.method, route.path if route else "unmatched"
+    ).observe(time.perf_counter() - start)
+
+    if SERVER_TIMING and (stats["timings"] or stats["counts"]):
+        response.headers["Server-Timing"] = server_timing(stats)
+    return response
+
+
+# Every uvicorn worker's metrics, merged from PROMETHEUS_MULTIPROC_DIR when
+# it's set (otherwise only the worker that answered)
+@app.get("/metrics")
+def metrics():
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/")
 def root():
     return {"message": "Letterboxd Service Running YAYY!"}
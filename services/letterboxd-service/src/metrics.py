@@ -0,0 +1,113 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import Counter, Histogram
+
+# ---------------------------------------
+# Process-wide metrics (exposed at /metrics in Prometheus text format)
+# ---------------------------------------
+STAGE_SECONDS = Histogram(
+    "letterboxd_stage_seconds",
+    "Time spent per import stage",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+PAGES = Counter(
+    "letterboxd_pages_total",
+    "Letterboxd pages requested, by kind and where the body came from",
+    ["kind", "source"],  # source: network, cache, revalidated, error
+)
+PAGE_BYTES = Counter(
+    "letterboxd_page_bytes_total",
+    "Page body bytes downloaded from Letterboxd",
+    ["kind"],
+)
+HTTP_RESPONSES = Counter(
+    "letterboxd_http_responses_total",
+    "Letterboxd HTTP responses by status code",
+    ["status"],
+)
+RETRIES = Counter(
+    "letterboxd_fetch_retries_total",
+    "Fetch attempts retried, by reason",
+    ["reason"],  # error, status code
+)
+HEDGED = Counter(
+    "letterboxd_fetch_hedged_total",
+    "Requests re-issued because the first was slower than p95",
+)
+BREAKER_SHED = Counter(
+    "letterboxd_breaker_shed_total",
+    "Fetches refused while the circuit breaker was open",
+)
+SLUGS = Counter(
+    "letterboxd_slugs_total",
+    "Slugs mapped, by the tier that answered or how they ended up",
+    # source: cache, pending, index, mongo, scraped, unresolvable, failed
+    ["source"],
+)
+RESULT_CACHE = Counter(
+    "letterboxd_result_cache_total",
+    "Watched/watchlist reads by how the per-user result cache answered",
+    ["outcome"],  # fresh, stale, miss, bypass
+)
+MONGO_WRITES = Counter(
+    "letterboxd_mongo_writes_total",
+    "Documents sent to Mongo in bulk writes",
+    ["collection"],
+)
+REQUEST_SECONDS = Histogram(
+    "letterboxd_request_seconds",
+    "HTTP request latency by route",
+    ["method", "route"],
+)
+
+# Per-request breakdown: { "timings": {stage: seconds}, "counts": {...} },
+# set by the Server-Timing middleware. Tasks spawned while serving a request
+# inherit it, so overlapping stages add up to more than the wall time.
+_request_stats: ContextVar[dict | None] = ContextVar("request_stats", default=None)
+
+
+def start_request_stats():
+    stats = {"timings": {}, "counts": {}}
+    _request_stats.set(stats)
+    return stats
+
+
+# ---------------------------------------
+# Record a stage's duration (histogram + the current request's breakdown)
+# ---------------------------------------
+def observe(stage: str, seconds: float):
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats["timings"][stage] = stats["timings"].get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def count_slugs(source: str, n: int):
+    if not n:
+        return
+    SLUGS.labels(source).inc(n)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats["counts"][f"slugs-{source}"] = stats["counts"].get(f"slugs-{source}", 0) + n
+
+
+# Server-Timing header value: "fetch_list;dur=12.3, ..., slugs-mongo;desc=42"
+def server_timing(stats: dict) -> str:
+    parts = [
+        f"{stage};dur={seconds * 1000:.1f}"
+        for stage, seconds in stats["timings"].items()
+    ]
+    parts += [f'{name};desc="{n}"' for name, n in stats["counts"].items()]
+    return ", ".join(parts)
@@ -0,0 +1,15 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional
+
+
+# Pydantic model (validation + response schema)
+class LetterboxdIdModel(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: str = Field(..., alias="_id")
+    tmdbId: int
+    imdbId: Optional[str] = None
+    title: Optional[str] = None
+    year: Optional[int] = None
+    runtime: Optional[int] = None
+    rating: Optional[float] = None
\ No newline at end of file
@@ -1,22 +1,125 @@
-from fastapi import APIRouter
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from src.controllers.letterboxd_controller import (
     get_watchlist,
     get_watched_movies,
-    get_movie_ids
+    get_movie_ids,
+    get_cache_stats,
+    get_batch,
+    export_mapping_table,
+    import_mapping_table,
+    stream_watched,
+    stream_watchlist,
+    to_columns,
 )
+from src.controllers.letterboxd_jobs_controller import create_job, get_job
 
 router = APIRouter(prefix="/letterboxd")
 
+# ?stream=ndjson → one JSON value per line, page by page as pages resolve
+StreamFormat = Optional[Literal["ndjson"]]
+
+# ?format=columnar → parallel arrays ({ movieIds, ratings }) instead of one
+# object per film
+ResponseFormat = Optional[Literal["columnar"]]
+FormatQuery = Query(None, alias="format")
+
+# These lists run to thousands of plain ints and floats: encode them
+# straight to JSON instead of walking them through FastAPI's encoder
+def list_response(list_type: str, records: list, response_format: ResponseFormat):
+    if response_format == "columnar":
+        return JSONResponse(to_columns(list_type, records))
+    return JSONResponse(records)
+
+# ?full_sync=true → re-scrape every page instead of syncing incrementally
+# ?max_age=N → accept a cached result up to N seconds old, re-resolve if
+#   it's older (without it: up to RESULT_CACHE_TTL, and an older one is
+#   still returned while it's refreshed in the background)
+# ?force_refresh=true → re-resolve now instead of using the cached result
+MaxAge = Query(None, ge=0)
+
 @router.get("/watchlist/{username}")
-async def route_watchlist(username: str):
+async def route_watchlist(
+    username: str, stream: StreamFormat = None, full_sync: bool = False,
+    max_age: Optional[float] = MaxAge, force_refresh: bool = False,
+    response_format: ResponseFormat = FormatQuery,
+):
+    if stream == "ndjson":
+        return StreamingResponse(
+            await stream_watchlist(username), media_type="application/x-ndjson"
+        )
     # get_watchlist is async -> MUST await
-    return await get_watchlist(username)
+    records = await get_watchlist(username, full_sync, max_age, force_refresh)
+    return list_response("watchlist", records, response_format)
 
 @router.get("/watched/{username}")
-async def route_watched(username: str):
-    return await get_watched_movies(username)
+async def route_watched(
+    username: str, stream: StreamFormat = None, full_sync: bool = False,
+    max_age: Optional[float] = MaxAge, force_refresh: bool = False,
+    response_format: ResponseFormat = FormatQuery,
+):
+    if stream == "ndjson":
+        return StreamingResponse(
+            await stream_watched(username), media_type="application/x-ndjson"
+        )
+    records = await get_watched_movies(username, full_sync, max_age, force_refresh)
+    return list_response("watched", records, response_format)
 
+# { "ids": [...], "details": true } → film metadata instead of bare TMDB IDs
 @router.post("/map")
 async def route_map(body: dict):
     slugs = body.get("ids", [])
-    return await get_movie_ids(slugs)
+    return await get_movie_ids(slugs, bool(body.get("details", False)))
+
+# Group sessions: { "usernames": [...], "full_sync": false }
+@router.post("/batch")
+async def route_batch(body: dict):
+    usernames = body.get("usernames", [])
+    if not isinstance(usernames, list) or not all(isinstance(u, str) for u in usernames):
+        raise HTTPException(status_code=400, detail="usernames must be a list of strings")
+    return await get_batch(usernames, bool(body.get("full_sync", False)))
+
+# Mapping table dump: ?gzip=true → gzipped NDJSON download
+@router.get("/mappings/export")
+async def route_export_mappings(gzip: bool = False):
+    filename = "letterboxd_ids.ndjson.gz" if gzip else "letterboxd_ids.ndjson"
+    return StreamingResponse(
+        export_mapping_table(gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# Body: an export (NDJSON, plain or gzipped). ?policy= decides what happens
+# to slugs that are already mapped: skip (default), overwrite or replace
+ImportPolicy = Literal["skip", "overwrite", "replace"]
+
+@router.post("/mappings/import")
+async def route_import_mappings(request: Request, policy: ImportPolicy = "skip"):
+    return await import_mapping_table(request.stream(), policy)
+
+@router.get("/cache/stats")
+async def route_cache_stats():
+    return get_cache_stats()
+
+# Background imports: POST returns a job id right away; poll the job for
+# progress and partial results
+@router.post("/jobs", status_code=202)
+async def route_create_job(body: dict):
+    username = body.get("username")
+    if username is not None and not isinstance(username, str):
+        raise HTTPException(status_code=400, detail="username must be a string")
+    priority = body.get("priority", 10)
+    if not isinstance(priority, int):
+        raise HTTPException(status_code=400, detail="priority must be an integer")
+    return await create_job(
+        username,
+        body.get("type"),
+        priority,
+        bool(body.get("full_sync", False)),
+    )
+
+@router.get("/jobs/{job_id}")
+async def route_get_job(job_id: str, response_format: ResponseFormat = FormatQuery):
+    return await get_job(job_id, response_format == "columnar")
@@ -0,0 +1,39 @@
+from src.config import FILM_PAGE_MAX_AGE, LETTERBOXD_BASE_URL
+from src.scraper.http import fetch, map_window
+from src.scraper.parser_pool import run_parser
+from src.scraper.parsing import parse_film_page
+from src.scraper.singleflight import SingleFlight
+
+FILM_URL = LETTERBOXD_BASE_URL + "/film/{}/"
+
+# Overlapping mapping requests share one fetch per slug
+film_flights = SingleFlight()
+
+
+# Film metadata from its page ({ tmdbId, imdbId, title, year, runtime,
+# rating }, tmdbId an int or "" when it has none), None when it couldn't
+# be fetched
+async def get_movie_data(movie):
+    # Film pages barely change: serve them from the page cache for a while
+    html = await fetch(FILM_URL.format(movie), max_age=FILM_PAGE_MAX_AGE, kind="film")
+    if html is None:
+        return None
+    # Parsing runs on the parser pool so the loop keeps fetching
+    return await run_parser(parse_film_page, html)
+
+
+# ---------------------------------------
+# Resolve slugs → film metadata, aligned with `movies` (see get_movie_data).
+# Film pages stream through a sliding window instead of fixed chunks.
+# ---------------------------------------
+async def scrape_films(movies):
+    return await map_window(
+        lambda movie: film_flights.do(movie, lambda: get_movie_data(movie)),
+        movies,
+    )
+
+
+# Same, TMDB IDs only ("" = no ID, None = couldn't fetch)
+async def scrape_tmdb_ids(movies):
+    films = await scrape_films(movies)
+    return [film["tmdbId"] if film is not None else None for film in films]
@@ -0,0 +1,269 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector
+
+from src.config import (
+    BREAKER_FAILURES,
+    BREAKER_RESET,
+    FETCH_BACKOFF_BASE,
+    FETCH_BACKOFF_MAX,
+    FETCH_RETRIES,
+    HEDGE_MIN_DELAY,
+    HEDGE_REQUESTS,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_TIMEOUT,
+    PAGE_CACHE_MAX_BYTES,
+    RETRY_AFTER_MAX,
+    SCRAPE_CONCURRENCY,
+)
+from src.metrics import (
+    BREAKER_SHED,
+    HEDGED,
+    HTTP_RESPONSES,
+    PAGE_BYTES,
+    PAGES,
+    RETRIES,
+    timed,
+)
+from src.scraper.page_cache import page_cache
+from src.scraper.resilience import (
+    CircuitBreaker,
+    LatencyTracker,
+    Throttle,
+    backoff_delay,
+    retry_after_seconds,
+)
+from src.scraper.scheduler import scheduler
+
+# One keep-alive pool for the whole process (owned by the app lifespan)
+_session: ClientSession | None = None
+
+
+# ---------------------------------------
+# Pool lifecycle
+# ---------------------------------------
+async def start_session():
+    global _session
+    if _session is None or _session.closed:
+        connector = TCPConnector(
+            limit=HTTP_MAX_CONNECTIONS,
+            limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        )
+        _session = ClientSession(
+            connector=connector,
+            timeout=ClientTimeout(total=HTTP_TIMEOUT),
+        )
+    return _session
+
+
+async def close_session():
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+async def get_session():
+    # Lazily start the pool when used outside the app (CLI scripts)
+    if _session is None or _session.closed:
+        return await start_session()
+    return _session
+
+
+@asynccontextmanager
+async def session_scope():
+    await start_session()
+    try:
+        yield
+    finally:
+        await close_session()
+
+
+# ---------------------------------------
+# Fetch a page through the shared pool. Returns the body of a 200 (or of
+# Letterboxd's 404 error page, which callers recognise as "not found"),
+# or None when the page couldn't be fetched — never an error body.
+#
+# Pages go through the on-disk page cache: a cached copy younger than
+# `max_age` seconds is served without a request, older ones are
+# revalidated with If-None-Match / If-Modified-Since.
+#
+# Transport errors, 429s and 5xx are retried up to FETCH_RETRIES times
+# with jittered exponential backoff; a Retry-After on 429/503 pauses every
+# fetch for that long. The circuit breaker sheds fetches while the
+# upstream keeps failing. `kind` ("list", "film") labels the metrics.
+#
+# Every request (each retry and hedge too) waits for a slot from the
+# fair-share scheduler; page cache hits don't.
+# ---------------------------------------
+CONTENT_STATUSES = {200, 404}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+breaker = CircuitBreaker(BREAKER_FAILURES, BREAKER_RESET)
+throttle = Throttle()
+latencies = LatencyTracker()
+
+
+async def fetch(url, max_age=0, kind="page"):
+    with timed(f"fetch_{kind}"):
+        body = await _fetch(url, max_age, kind)
+    if body is None:
+        PAGES.labels(kind, "error").inc()
+    return body
+
+
+async def _fetch(url, max_age, kind):
+    cached = await asyncio.to_thread(page_cache.get, url) if PAGE_CACHE_MAX_BYTES else None
+    if cached is not None and cached.age < max_age:
+        PAGES.labels(kind, "cache").inc()
+        return cached.body
+
+    headers = cached.validators() if cached is not None else None
+
+    for attempt in range(FETCH_RETRIES + 1):
+        probe = breaker.state == "half-open"
+        if not breaker.allow():
+            BREAKER_SHED.inc()
+            return None
+
+        try:
+            await throttle.wait()
+            status, body, response_headers = await _request(url, headers)
+        except (ClientError, asyncio.TimeoutError):
+            breaker.failure()
+            reason = "error"
+        except asyncio.CancelledError:
+            # Prefetch, windows and hedges cancel fetches routinely
+            if probe:
+                breaker.abandon_probe()
+            raise
+        else:
+            HTTP_RESPONSES.labels(str(status)).inc()
+
+            if status == 304 and cached is not None:
+                breaker.success()
+                PAGES.labels(kind, "revalidated").inc()
+                await asyncio.to_thread(page_cache.revalidated, url, cached)
+                return cached.body
+
+            if status in CONTENT_STATUSES:
+                breaker.success()
+                PAGES.labels(kind, "network").inc()
+                PAGE_BYTES.labels(kind).inc(len(body))
+
+                etag = response_headers.get("ETag")
+                last_modified = response_headers.get("Last-Modified")
+                if PAGE_CACHE_MAX_BYTES and status == 200 and (etag or last_modified or max_age):
+                    await asyncio.to_thread(page_cache.put, url, body, etag, last_modified)
+                return body
+
+            breaker.failure()
+            if status not in RETRY_STATUSES:
+                return None
+
+            reason = str(status)
+            retry_after = retry_after_seconds(response_headers.get("Retry-After"))
+            if status in (429, 503) and retry_after is not None:
+                if retry_after > RETRY_AFTER_MAX:
+                    return None
+                throttle.pause(retry_after)
+
+        if attempt == FETCH_RETRIES:
+            break
+        RETRIES.labels(reason).inc()
+        await asyncio.sleep(backoff_delay(attempt, FETCH_BACKOFF_BASE, FETCH_BACKOFF_MAX))
+
+    return None
+
+
+# One GET → (status, body, headers); raises on transport errors
+async def _attempt(url, headers):
+    session = await get_session()
+    start = time.monotonic()
+    async with session.get(url, headers=headers) as response:
+        body = await response.read()
+    latencies.add(time.monotonic() - start)
+    return response.status, body, response.headers
+
+
+# ---------------------------------------
+# With HEDGE_REQUESTS on, a GET still pending after the recent p95 latency
+# is sent a second time and whichever answers first wins (the other is
+# cancelled). Costs ~5% extra requests, cuts the tail a straggler causes.
+# The hedge waits for its own scheduler slot.
+# ---------------------------------------
+async def _request(url, headers):
+    async with scheduler.slot():
+        delay = latencies.percentile(95) if HEDGE_REQUESTS else None
+        if delay is None or breaker.state != "closed":
+            return await _attempt(url, headers)
+
+        first = asyncio.ensure_future(_attempt(url, headers))
+        done, _ = await asyncio.wait({first}, timeout=max(delay, HEDGE_MIN_DELAY))
+        if done:
+            return first.result()
+
+        HEDGED.inc()
+        pending = {first, asyncio.ensure_future(_scheduled_attempt(url, headers))}
+        try:
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                if not pending:
+                    raise done.pop().exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+async def _scheduled_attempt(url, headers):
+    async with scheduler.slot():
+        return await _attempt(url, headers)
+
+
+# ---------------------------------------
+# Sliding-window fan-out: at most `limit` calls in flight, a new one starts
+# as soon as any finishes. Yields (item, result) in completion order.
+# ---------------------------------------
+async def iter_window(func, items, limit=SCRAPE_CONCURRENCY):
+    items = iter(items)
+    pending = {}
+
+    def spawn():
+        for item in items:
+            pending[asyncio.ensure_future(func(item))] = item
+            return
+
+    try:
+        for _ in range(limit):
+            spawn()
+
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item = pending.pop(task)
+                spawn()
+                yield item, task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+# Same as iter_window, but returns results aligned with `items`
+async def map_window(func, items, limit=SCRAPE_CONCURRENCY):
+    items = list(items)
+    results = [None] * len(items)
+    async for index, result in iter_window(
+        lambda i: func(items[i]), range(len(items)), limit
+    ):
+        results[index] = result
+    return results
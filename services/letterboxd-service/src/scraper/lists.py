@@ -0,0 +1,305 @@
+import asyncio
+import hashlib
+
+from src.config import LETTERBOXD_BASE_URL, LIST_PAGE_MAX_AGE, SPECULATIVE_PAGES
+from src.metrics import timed
+from src.scraper.http import fetch, iter_window
+from src.scraper.parser_pool import run_parser
+from src.scraper.parsing import parse_list_page
+
+LIST_URLS = {
+    "watched": LETTERBOXD_BASE_URL + "/{}/films/page/{}/",
+    "watchlist": LETTERBOXD_BASE_URL + "/{}/watchlist/page/{}/",
+}
+
+
+# rated-8 → 4.0 (0–5 scale), unrated → 0
+def rating_of(rated):
+    return rated / 2 if rated else 0
+
+
+# ---------------------------------------
+# Parsed watched entries → [{ movie_id, rating }]
+# ---------------------------------------
+def generate_movies_objects(entries):
+    return [{"movie_id": slug, "rating": rating_of(rated)} for slug, rated in entries]
+
+
+# ---------------------------------------
+# Parsed watchlist entries → movie IDs
+# ---------------------------------------
+def generate_watchlist_objects(entries):
+    return [slug for slug, _ in entries]
+
+
+PARSERS = {
+    "watched": generate_movies_objects,
+    "watchlist": generate_watchlist_objects,
+}
+
+
+# One page of a user's list (raw HTML, None if it couldn't be fetched)
+def _fetch_page(username, list_type, page):
+    url = LIST_URLS[list_type].format(username, page)
+    return fetch(url, max_age=LIST_PAGE_MAX_AGE, kind="list")
+
+
+# ---------------------------------------
+# Fetch page 1 of a user's list, which carries both its first entries and
+# the page count. Pages 2..SPECULATIVE_PAGES+1 are requested alongside it
+# and the ones past the real count are cancelled once it's known.
+#
+# Returns (entries, num_pages, prefetched) where prefetched maps page →
+# in-flight fetch task for iter_user_pages to pick up. num_pages is -1 if
+# the user doesn't exist.
+# ---------------------------------------
+async def open_list(username, list_type, speculate=SPECULATIVE_PAGES):
+    prefetched = {
+        page: asyncio.ensure_future(_fetch_page(username, list_type, page))
+        for page in range(2, speculate + 2)
+    }
+
+    try:
+        with timed("first_page"):
+            html = await _fetch_page(username, list_type, 1)
+            if html is None:
+                raise RuntimeError(f"couldn't fetch {list_type} page 1 of {username}")
+            entries, num_pages = await run_parser(parse_list_page, html)
+    except BaseException:
+        cancel_prefetched(prefetched)
+        raise
+
+    for page in [page for page in prefetched if page > num_pages]:
+        prefetched.pop(page).cancel()
+
+    return entries, num_pages, prefetched
+
+
+def cancel_prefetched(prefetched):
+    for task in prefetched.values():
+        task.cancel()
+    prefetched.clear()
+
+
+# ---------------------------------------
+# Fetch and parse a user's list page by page, yielding (page, entries) as
+# each page completes; entries are compact (slug, rated) tuples. Only the
+# pages in the fetch window are held at once.
+#
+# Pass `first`/`prefetched` from open_list to reuse page 1 and the pages
+# already in flight instead of requesting them again.
+# ---------------------------------------
+async def iter_user_pages(username, list_type, num_pages, first=None, prefetched=None):
+    prefetched = prefetched if prefetched is not None else {}
+
+    async def fetch_page(page):
+        task = prefetched.pop(page, None)
+        if task is not None:
+            return await task
+        return await _fetch_page(username, list_type, page)
+
+    try:
+        pages = range(1, num_pages + 1)
+        if first is not None:
+            yield 1, first
+            pages = pages[1:]
+
+        async for page, html in iter_window(fetch_page, pages):
+            # A missing page would silently drop its films from the list
+            if html is None:
+                raise RuntimeError(f"couldn't fetch {list_type} page {page} of {username}")
+
+            # Parsing runs on the parser pool so the loop keeps fetching
+            entries, _ = await run_parser(parse_list_page, html)
+            yield page, entries
+    finally:
+        cancel_prefetched(prefetched)
+
+
+# Every page of a user's list, in list order.
+# on_page(pages_done, num_pages) is called as each page lands, and
+# `await on_entries(entries)` hands its entries downstream straight away
+# (fetching pauses while it blocks).
+async def get_user_pages(username, list_type, num_pages, on_page=None,
+                         first=None, prefetched=None, on_entries=None):
+    pages = [[] for _ in range(num_pages)]
+    done = 0
+    async for page, entries in iter_user_pages(
+        username, list_type, num_pages, first, prefetched
+    ):
+        pages[page - 1] = entries
+        done += 1
+        if on_page:
+            on_page(done, num_pages)
+        if on_entries:
+            await on_entries(entries)
+    return pages
+
+
+async def get_user_movies(username, num_pages):
+    pages = await get_user_pages(username, "watched", num_pages)
+    return [generate_movies_objects(page) for page in pages]
+
+
+async def get_user_watchlist(username, num_pages):
+    pages = await get_user_pages(username, "watchlist", num_pages)
+    return [generate_watchlist_objects(page) for page in pages]
+
+
+# Every page of a user's list (None if the user doesn't exist)
+async def fetch_list(username, list_type, on_page=None, on_entries=None):
+    first, num_pages, prefetched = await open_list(username, list_type)
+
+    if num_pages == -1:
+        return None
+
+    return await get_user_pages(
+        username, list_type, num_pages, on_page, first, prefetched, on_entries
+    )
+
+
+# ---------------------------------------
+# A user's full list, flattened and formatted
+# ---------------------------------------
+async def scrape_list(username, list_type):
+    pages = await fetch_list(username, list_type) or []
+
+    entries = []
+    for page in pages:
+        entries += page
+    return PARSERS[list_type](entries)
+
+
+async def scrape_watched(username):
+    return await scrape_list(username, "watched")
+
+
+async def scrape_watchlist(username):
+    return await scrape_list(username, "watchlist")
+
+
+# ---------------------------------------
+# Incremental sync against a previous snapshot of the same list.
+#
+# Lists are newest-first, so only the top changes between syncs: fetch
+# pages from page 1 until one ends in a run of already-known slugs, then
+# splice the snapshot's tail (after the page's last entry) under the new
+# entries. The run must be in the snapshot's order, back to back; if it
+# isn't (a known film moved up, one was removed in between), the list is
+# fetched in full instead. Rating changes and removals further down only
+# show up on a full sync.
+#
+# snapshot: { "entries": [[slug, rated], ...], "pageFingerprints": [...],
+#             "perPage": n }
+# Returns the new snapshot ("full" is True when every page was fetched and
+# nothing came from the old one), or None if the user doesn't exist.
+# on_page / on_entries are called as pages land (see get_user_pages); the
+# snapshot's spliced tail only shows up in the returned entries.
+# ---------------------------------------
+def page_fingerprint(entries):
+    digest = hashlib.blake2b(digest_size=8)
+    for slug, rated in entries:
+        digest.update(f"{slug}:{rated};".encode())
+    return digest.hexdigest()
+
+
+def make_snapshot(entries, per_page, full):
+    per_page = per_page or 1
+    return {
+        "entries": [list(e) for e in entries],
+        "pageFingerprints": [
+            page_fingerprint(entries[start:start + per_page])
+            for start in range(0, len(entries), per_page)
+        ],
+        "perPage": per_page,
+        "full": full,
+    }
+
+
+# Index where `page` runs into the snapshot (every entry from there to the
+# end of the page is known), or None if it hasn't reached the snapshot yet
+def _overlap_start(page, known):
+    start = None
+    for i in range(len(page) - 1, -1, -1):
+        if page[i][0] not in known:
+            break
+        start = i
+    return start
+
+
+# Whether page[start:] is a stretch of the snapshot as it was: consecutive
+# snapshot indices, in order
+def _overlap_in_order(page, start, known):
+    indices = [known[slug] for slug, _ in page[start:]]
+    return all(b == a + 1 for a, b in zip(indices, indices[1:]))
+
+
+async def sync_list(username, list_type, snapshot=None, on_page=None, on_entries=None):
+    if not snapshot or not snapshot.get("entries"):
+        pages = await fetch_list(username, list_type, on_page, on_entries)
+        if pages is None:
+            return None
+        entries = [tuple(e) for page in pages for e in page]
+        return make_snapshot(entries, len(pages[0]) if pages else 0, True)
+
+    old_entries = [tuple(e) for e in snapshot["entries"]]
+    old_fingerprints = snapshot.get("pageFingerprints") or []
+    known = {slug: i for i, (slug, _) in enumerate(old_entries)}
+
+    fetched = []
+    per_page = 0
+    page = 1
+    while True:
+        # One page at a time: most syncs stop at page 1, so no speculation
+        html = await _fetch_page(username, list_type, page)
+        if html is None:
+            raise RuntimeError(f"couldn't fetch {list_type} page {page} of {username}")
+
+        entries, num_pages = await run_parser(parse_list_page, html)
+        if num_pages == -1:
+            return None
+        if on_page:
+            on_page(page, num_pages)
+
+        if page == 1:
+            per_page = len(entries)
+            # Nothing changed at the top of the list
+            if old_fingerprints and page_fingerprint(entries) == old_fingerprints[0]:
+                return make_snapshot(old_entries, snapshot.get("perPage", per_page), False)
+
+        if on_entries:
+            await on_entries(entries)
+
+        fetched += entries
+        overlap = _overlap_start(entries, known)
+        if overlap is not None:
+            break
+
+        if page >= num_pages or not entries:
+            # Walked the whole list without meeting the snapshot
+            return make_snapshot(fetched, per_page, True)
+        page += 1
+
+    if not _overlap_in_order(entries, overlap, known):
+        # The list was reordered under the snapshot: splicing would drop or
+        # repeat films, so start over
+        return await sync_list(username, list_type, None, on_page, on_entries)
+
+    # Splice: new/updated entries on top, the snapshot's tail below
+    seen = {slug for slug, _ in fetched}
+    tail = [e for e in old_entries[known[entries[-1][0]] + 1:] if e[0] not in seen]
+    return make_snapshot(fetched + tail, per_page, False)
+
+
+# ---------------------------------------
+# CLI helper: fetch lists for multiple users
+# ---------------------------------------
+async def get_users_data(usernames, list_type):
+    results = await asyncio.gather(
+        *(scrape_list(username, list_type) for username in usernames)
+    )
+
+    entries = []
+    for user_entries in results:
+        entries += user_entries
+    return entries
@@ -0,0 +1,197 @@
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from src.config import PAGE_CACHE_DIR, PAGE_CACHE_MAX_BYTES, PAGE_CACHE_SYNC_INTERVAL
+
+# File layout: MAGIC | header length (uint32) | JSON header | zlib body.
+# The body is one contiguous block at the end, so it can be decompressed
+# straight out of a read-only mmap of the file.
+MAGIC = b"LBPC"
+PREFIX = struct.Struct("<4sI")
+# Held by the worker rescanning and evicting the shared directory
+LOCK_NAME = ".lock"
+
+
+class CachedPage:
+    def __init__(self, body: bytes, etag, last_modified, fetched_at: float):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+    # Headers for a conditional GET
+    def validators(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+# ----------------------------------------
+# Size-bounded, LRU-evicted cache of page bodies on local disk, one file
+# per URL. Methods do blocking file I/O; call them via asyncio.to_thread.
+# File mtimes carry the LRU order across restarts and between workers.
+#
+# Several workers can share the directory. Lookups go to the file itself,
+# so a page another worker wrote is a hit. The index here is only for
+# the size bound: every PAGE_CACHE_SYNC_INTERVAL, or sooner once it's
+# over max_bytes, it's rebuilt from a scan of the directory and the
+# oldest files (whoever wrote them) are evicted, under a lock file so one
+# worker at a time does it.
+# ----------------------------------------
+class PageCache:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._files: OrderedDict = OrderedDict()  # name -> size, oldest first
+        self._synced_at: float | None = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._synced_at is None:
+            self._sync()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    @staticmethod
+    def _name(url):
+        return hashlib.sha1(url.encode()).hexdigest()
+
+    def get(self, url) -> CachedPage | None:
+        self._maybe_sync()
+        name = self._name(url)
+
+        try:
+            with open(self._path(name), "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                magic, header_len = PREFIX.unpack_from(mm, 0)
+                if magic != MAGIC:
+                    raise ValueError("bad page cache file")
+                start = PREFIX.size + header_len
+                header = json.loads(mm[PREFIX.size:start])
+                body = zlib.decompress(mm[start:])
+                size = len(mm)
+        except FileNotFoundError:
+            # Never cached, or evicted by another worker
+            self._forget(name)
+            return None
+        except (OSError, ValueError, zlib.error):
+            self._drop(name)
+            return None
+
+        self._touch(name, size)
+        return CachedPage(body, header.get("etag"), header.get("lastModified"),
+                          header["fetchedAt"])
+
+    def put(self, url, body: bytes, etag=None, last_modified=None):
+        self._maybe_sync()
+        name = self._name(url)
+        header = json.dumps({
+            "url": url,
+            "etag": etag,
+            "lastModified": last_modified,
+            "fetchedAt": time.time(),
+        }).encode()
+        data = PREFIX.pack(MAGIC, len(header)) + header + zlib.compress(body, 6)
+
+        # Write-then-rename so other workers never read a half-written file
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self._path(f"{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(name))
+
+        with self._lock:
+            self.total_bytes += len(data) - self._files.pop(name, 0)
+            self._files[name] = len(data)
+        self._maybe_sync()
+
+    # A 304 confirmed the cached body: restart its freshness window
+    def revalidated(self, url, page: CachedPage):
+        self.put(url, page.body, page.etag, page.last_modified)
+
+    def _touch(self, name, size):
+        with self._lock:
+            if name not in self._files:
+                self.total_bytes += size
+                self._files[name] = size
+            self._files.move_to_end(name)
+        try:
+            os.utime(self._path(name))
+        except OSError:
+            pass
+
+    def _forget(self, name):
+        with self._lock:
+            self.total_bytes -= self._files.pop(name, 0)
+
+    def _drop(self, name):
+        self._forget(name)
+        try:
+            os.unlink(self._path(name))
+        except OSError:
+            pass
+
+    def _maybe_sync(self):
+        if (self._synced_at is None or self.total_bytes > self.max_bytes
+                or time.monotonic() - self._synced_at >= PAGE_CACHE_SYNC_INTERVAL):
+            self._sync()
+
+    # Rescan the directory (every worker's files) and evict the oldest
+    # while it's over max_bytes
+    def _sync(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(LOCK_NAME), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another worker is at it; count on its eviction
+                self._synced_at = time.monotonic()
+                return
+
+            files = []
+            with os.scandir(self.directory) as it:
+                for e in it:
+                    if e.name == LOCK_NAME or e.name.endswith(".tmp"):
+                        continue
+                    try:
+                        st = e.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((st.st_mtime, e.name, st.st_size))
+            files.sort()
+
+            total = sum(size for _, _, size in files)
+            evict = 0
+            while total > self.max_bytes and evict < len(files):
+                _, name, size = files[evict]
+                try:
+                    os.unlink(self._path(name))
+                except OSError:
+                    pass
+                total -= size
+                evict += 1
+
+            with self._lock:
+                self._files = OrderedDict((name, size) for _, name, size in files[evict:])
+                self.total_bytes = total
+                self._synced_at = time.monotonic()
+
+
+page_cache = PageCache(PAGE_CACHE_DIR, PAGE_CACHE_MAX_BYTES)
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from src.config import PARSER_EXECUTOR, PARSER_WORKERS
+from src.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Owned by the app lifespan; None means parse inline (CLI scripts)
+_executor = None
+
+
+# ---------------------------------------
+# CPUs this container may actually use (cgroup quota, then affinity)
+# ---------------------------------------
+def available_cpus():
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return len(os.sched_getaffinity(0))
+
+
+# ---------------------------------------
+# Pool lifecycle
+# ---------------------------------------
+def start_parser_pool(kind=PARSER_EXECUTOR, workers=PARSER_WORKERS):
+    global _executor
+    if _executor is not None or kind == "inline":
+        return
+
+    workers = workers or available_cpus()
+    if kind == "thread":
+        _executor = ThreadPoolExecutor(workers, thread_name_prefix="parser")
+    else:
+        # spawn: don't fork a process that already runs Mongo/aiohttp threads
+        _executor = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+
+def shutdown_parser_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+# ---------------------------------------
+# Run a parser from src.scraper.parsing off the event loop
+# ---------------------------------------
+async def run_parser(func, html):
+    # Stage name: parse_list_page / parse_film_page (includes pool queueing)
+    with timed(func.__name__):
+        if _executor is None:
+            return func(html)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(_executor, func, html)
+        except BrokenProcessPool:
+            logger.warning("parser pool broke; parsing %s inline", func.__name__)
+            return func(html)
@@ -0,0 +1,238 @@
+import re
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+# Film pages are fed in chunks so parsing can stop once we have everything
+CHUNK_SIZE = 16 * 1024
+
+IMDB_ID = re.compile(r"/title/(tt\d+)")
+RUNTIME = re.compile(r"(\d[\d,]*)\s*min")
+TITLE_YEAR = re.compile(r"^(.*) \((\d{4})\)$")
+RATING = re.compile(r"^(\d+(?:\.\d+)?) out of 5")
+
+
+# ---------------------------------------
+# Targeted extraction with lxml's incremental (pull) parser. These only
+# look at the few elements we need instead of building a soup of the whole
+# page. Each raises ValueError when the page doesn't look like what we
+# expect, so callers can fall back to the BeautifulSoup parsers.
+# ---------------------------------------
+def _classes(el):
+    return el.get("class", "").split()
+
+
+# Film page → { tmdbId, imdbId, title, year, runtime, rating }, the
+# fields other than tmdbId None when the page doesn't have them. tmdbId is
+# an int, or "" if the page isn't a film page or has no (numeric) ID.
+def empty_film(tmdb_id=""):
+    tmdb_id = tmdb_id.strip()
+    return {"tmdbId": int(tmdb_id) if tmdb_id.isdigit() else "", "imdbId": None, "title": None, "year": None,
+            "runtime": None, "rating": None}
+
+
+def _title_year(film, og_title):
+    match = TITLE_YEAR.match(og_title)
+    if match:
+        film["title"], film["year"] = match.group(1), int(match.group(2))
+    else:
+        film["title"] = og_title
+
+
+def _runtime(film, text):
+    match = RUNTIME.search(text)
+    if match:
+        film["runtime"] = int(match.group(1).replace(",", ""))
+
+
+def _rating(film, content):
+    match = RATING.match(content or "")
+    if match:
+        film["rating"] = float(match.group(1))
+
+
+# Head: og:title ("Title (Year)") and twitter:data2 ("4.55 out of 5").
+# Body: data-tmdb-id, then the footer line under the synopsis that holds
+# the runtime and the IMDb link; parsing stops once that footer closes.
+def extract_film(html: bytes) -> dict:
+    parser = etree.HTMLPullParser(events=("start", "end"))
+    film = None
+    head = {}
+
+    for start in range(0, len(html), CHUNK_SIZE):
+        parser.feed(html[start:start + CHUNK_SIZE])
+
+        for event, el in parser.read_events():
+            tag = el.tag
+
+            if event == "start":
+                if tag == "meta" and film is None:
+                    key = el.get("property") or el.get("name")
+                    if key in ("og:title", "twitter:data2"):
+                        head[key] = el.get("content")
+                elif tag == "body":
+                    if "film" not in _classes(el):
+                        return empty_film()
+                    film = empty_film(el.get("data-tmdb-id", ""))
+                    if head.get("og:title"):
+                        _title_year(film, head["og:title"])
+                    _rating(film, head.get("twitter:data2"))
+                elif tag == "a" and film is not None and el.get("data-track-action") == "IMDb":
+                    match = IMDB_ID.search(el.get("href", ""))
+                    if match:
+                        film["imdbId"] = match.group(1)
+                continue
+
+            # event == "end"
+            if film is None:
+                continue
+            if tag == "div" and film["year"] is None and "releaseyear" in _classes(el):
+                text = "".join(el.itertext()).strip()
+                if text.isdigit():
+                    film["year"] = int(text)
+            elif tag == "p" and "text-footer" in _classes(el):
+                _runtime(film, "".join(el.itertext()))
+                return film
+
+    if film is None:
+        raise ValueError("no <body> in film page")
+    return film
+
+
+# List page (watched/watchlist) → ([(slug, rated)], num_pages) in one pass.
+# `rated` is Letterboxd's rated-N class (0–10, 0 = unrated); num_pages is
+# -1 for Letterboxd's error page (unknown user).
+def extract_list_page(html: bytes) -> tuple[list[tuple[str, int]], int]:
+    parser = etree.HTMLPullParser(events=("start", "end"))
+    parser.feed(html)
+    parser.close()
+
+    entries = []
+    num_pages = 1
+    seen_body = False
+    item = slug = None
+    rated = 0
+    rating_seen = False
+
+    for event, el in parser.read_events():
+        tag = el.tag
+
+        if event == "start":
+            if tag == "body":
+                seen_body = True
+                if "error" in _classes(el):
+                    return [], -1
+            elif tag == "li" and "griditem" in _classes(el):
+                item, slug, rated, rating_seen = el, None, 0, False
+            elif item is not None:
+                if tag == "div" and slug is None and "react-component" in _classes(el):
+                    slug = el.get("data-item-slug")
+                elif tag == "span" and not rating_seen and "rating" in _classes(el):
+                    # Only the first rating span counts: <span class="rating rated-8">
+                    rating_seen = True
+                    for c in _classes(el):
+                        if c.startswith("rated-"):
+                            rated = int(c[len("rated-"):])
+                            break
+            continue
+
+        # event == "end"
+        if el is item:
+            if slug:
+                entries.append((slug, rated))
+            item = None
+            el.clear()
+        elif tag == "li" and "paginate-page" in _classes(el):
+            # The last paginate-page <li> holds the page count
+            text = "".join(el.itertext()).strip().replace(",", "")
+            if text.isdigit():
+                num_pages = int(text)
+
+    if not seen_body:
+        raise ValueError("no <body> in list page")
+
+    return entries, num_pages
+
+
+# ---------------------------------------
+# BeautifulSoup fallbacks (same return shapes as the fast path)
+# ---------------------------------------
+def soup_film(html: bytes) -> dict:
+    soup = BeautifulSoup(html, "lxml")
+    body = soup.find("body", attrs={"class": "film"})
+    if body is None or not body.get("data-tmdb-id"):
+        return empty_film()
+
+    film = empty_film(body["data-tmdb-id"])
+
+    og_title = soup.find("meta", attrs={"property": "og:title"})
+    if og_title and og_title.get("content"):
+        _title_year(film, og_title["content"])
+
+    rating = soup.find("meta", attrs={"name": "twitter:data2"})
+    _rating(film, rating.get("content") if rating else None)
+
+    imdb = soup.find("a", attrs={"data-track-action": "IMDb"})
+    match = IMDB_ID.search(imdb.get("href", "")) if imdb else None
+    if match:
+        film["imdbId"] = match.group(1)
+
+    footer = soup.find("p", class_="text-footer")
+    if footer:
+        _runtime(film, footer.get_text())
+
+    return film
+
+
+def soup_list_page(html: bytes) -> tuple[list[tuple[str, int]], int]:
+    soup = BeautifulSoup(html, "lxml")
+    body = soup.find("body")
+
+    if body is None or "error" in body.get("class", []):
+        return [], -1
+
+    entries = []
+
+    # Letterboxd list pages use <li class="griditem">
+    for item in soup.find_all("li", {"class": "griditem"}):
+        rc = item.select_one("div.react-component")
+        slug = rc.get("data-item-slug") if rc else None
+        if not slug:
+            continue
+
+        # Extract rating: look for <span class="rating rated-8">
+        rated = 0
+        rating_span = item.find("span", class_="rating")
+        if rating_span:
+            classes = rating_span.get("class", [])
+            rated_class = next((c for c in classes if c.startswith("rated-")), None)
+            if rated_class:
+                rated = int(rated_class.split("-")[-1])  # rated-8 → 8
+
+        entries.append((slug, rated))
+
+    try:
+        last_page = soup.find_all("li", {"class": "paginate-page"})[-1]
+        num_pages = int(last_page.find("a").text.replace(",", ""))
+    except (IndexError, AttributeError, ValueError):
+        num_pages = 1
+
+    return entries, num_pages
+
+
+# ---------------------------------------
+# Entry points run on the parser pool: raw page bytes in, compact
+# tuples out. Fast path first, BeautifulSoup when it fails.
+# ---------------------------------------
+def parse_film_page(html: bytes) -> dict:
+    try:
+        return extract_film(html)
+    except Exception:
+        return soup_film(html)
+
+
+def parse_list_page(html: bytes) -> tuple[list[tuple[str, int]], int]:
+    try:
+        return extract_list_page(html)
+    except Exception:
+        return soup_list_page(html)
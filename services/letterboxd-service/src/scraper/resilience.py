@@ -0,0 +1,111 @@
+import asyncio
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+
+# ---------------------------------------
+# Exponential backoff with "equal jitter": half the delay is fixed, half
+# random, so retries from many concurrent fetches spread out
+# ---------------------------------------
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    delay = min(cap, base * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+# Retry-After header → seconds (delta-seconds or an HTTP date), or None
+def retry_after_seconds(value) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------------------------------------
+# Circuit breaker over upstream failures. After `threshold` failures in a
+# row it opens and fetches fail fast for `reset_timeout` seconds; then one
+# probe is let through (half-open) and its outcome closes or re-opens it.
+# A probe that ends with neither (its fetch was cancelled) must call
+# abandon_probe, or no other would ever be let through.
+# ---------------------------------------
+class CircuitBreaker:
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trips = 0
+        self._probing = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def abandon_probe(self):
+        self._probing = False
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def failure(self):
+        self.failures += 1
+        if self._probing or (self.opened_at is None and self.failures >= self.threshold):
+            self.trips += 1
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+
+# ---------------------------------------
+# Rolling window of request latencies, for picking the hedge delay
+# ---------------------------------------
+class LatencyTracker:
+    def __init__(self, size: int = 500):
+        self.samples: deque = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        if len(self.samples) < 20:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+# ---------------------------------------
+# Shared pause after a 429/503 with Retry-After: every fetch waits it out
+# instead of each one finding out on its own
+# ---------------------------------------
+class Throttle:
+    def __init__(self):
+        self.until = 0.0
+
+    def pause(self, seconds: float):
+        self.until = max(self.until, time.monotonic() + seconds)
+
+    async def wait(self):
+        delay = self.until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,156 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from src.config import UPSTREAM_BURST, UPSTREAM_MAX_IN_FLIGHT, UPSTREAM_RATE
+from src.metrics import observe
+
+# Served in this order: an interactive request waiting for a slot always
+# goes before any bulk import
+PRIORITIES = ("interactive", "bulk")
+
+# The flow outbound fetches are charged to: (key, priority, weight). Tasks
+# spawned while it's set inherit it, so set it once around an import.
+_flow: ContextVar[tuple] = ContextVar("upstream_flow", default=("default", "bulk", 1))
+
+
+@contextmanager
+def flow(key: str, priority: str = "bulk", weight: int = 1):
+    token = _flow.set((key, priority, weight))
+    try:
+        yield
+    finally:
+        _flow.reset(token)
+
+
+# For an async generator, which mustn't hold flow() open across a yield:
+# if it isn't closed explicitly, it's finalized in another Context and the
+# reset fails. Sets the flow for the rest of whatever task iterates it.
+def set_flow(key: str, priority: str = "bulk", weight: int = 1):
+    _flow.set((key, priority, weight))
+
+
+class _Flow:
+    def __init__(self, weight: int):
+        self.weight = max(1, weight)
+        self.credit = self.weight
+        self.waiters: deque = deque()
+
+
+# ---------------------------------------
+# Fair-share scheduler for requests to Letterboxd. A token bucket (`rate`
+# per second, bursts of `burst`) is the service-wide budget and at most
+# `max_in_flight` requests are out at once.
+#
+# Waiting requests queue per flow (one import, one /map call). Slots go to
+# the interactive flows first, then round-robin across the bulk ones, each
+# taking up to `weight` slots per turn. A 20-film import is served as soon
+# as its turn comes, not after every page of a 5,000-film one.
+# ---------------------------------------
+class FairScheduler:
+    def __init__(self, rate: float, burst: int, max_in_flight: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_in_flight = max(1, max_in_flight)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.in_flight = 0
+        self._flows = {priority: OrderedDict() for priority in PRIORITIES}
+        self._timer: asyncio.TimerHandle | None = None
+
+    # Hold a slot for one request, charged to the current flow
+    @asynccontextmanager
+    async def slot(self):
+        key, priority, weight = _flow.get()
+        start = time.perf_counter()
+        await self._acquire(key, priority, weight)
+        observe(f"upstream_wait_{priority}", time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._dispatch()
+
+    async def _acquire(self, key, priority, weight):
+        flows = self._flows[priority]
+        state = flows.get(key)
+        if state is None:
+            state = flows[key] = _Flow(weight)
+
+        waiter = asyncio.get_running_loop().create_future()
+        state.waiters.append(waiter)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as the caller went away: hand the slot on
+                self.in_flight -= 1
+                self._dispatch()
+            else:
+                # _dispatch may already have dropped it from the queue
+                if waiter in state.waiters:
+                    state.waiters.remove(waiter)
+                if not state.waiters and flows.get(key) is state:
+                    del flows[key]
+            raise
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # The flow whose turn it is: (priority's flows, key, flow) or None
+    def _next(self):
+        for flows in self._flows.values():
+            if flows:
+                key, state = next(iter(flows.items()))
+                return flows, key, state
+        return None
+
+    # Grant slots while there's room in flight and tokens in the bucket
+    def _dispatch(self):
+        while self.in_flight < self.max_in_flight:
+            turn = self._next()
+            if turn is None:
+                return
+
+            # A waiter cancelled before its turn came: its task hasn't run
+            # its cleanup yet, so drop it here rather than grant it a slot
+            flows, key, state = turn
+            if state.waiters[0].done():
+                state.waiters.popleft()
+                if not state.waiters:
+                    del flows[key]
+                continue
+
+            if self.rate > 0:
+                self._refill()
+                if self.tokens < 1:
+                    # (a timer already due is re-armed: its loop may be gone)
+                    loop = asyncio.get_running_loop()
+                    if self._timer is None or self._timer.when() <= loop.time():
+                        delay = (1 - self.tokens) / self.rate
+                        self._timer = loop.call_later(delay, self._wake)
+                    return
+                self.tokens -= 1
+
+            self.in_flight += 1
+            state.waiters.popleft().set_result(None)
+
+            # Spent its turn (or nothing left to send): next flow up
+            state.credit -= 1
+            if not state.waiters:
+                del flows[key]
+            elif state.credit <= 0:
+                state.credit = state.weight
+                flows.move_to_end(key)
+
+    def _wake(self):
+        self._timer = None
+        self._dispatch()
+
+
+scheduler = FairScheduler(UPSTREAM_RATE, UPSTREAM_BURST, UPSTREAM_MAX_IN_FLIGHT)
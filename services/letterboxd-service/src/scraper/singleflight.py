@@ -0,0 +1,29 @@
+import asyncio
+
+
+# ---------------------------------------
+# Single-flight: concurrent calls with the same key share one in-flight
+# call and all receive its result (or its exception). The shared task is
+# shielded, so one caller going away doesn't cancel it for the others.
+# ---------------------------------------
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict = {}
+
+    def __contains__(self, key):
+        return key in self._calls
+
+    async def do(self, key, func):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Don't warn about exceptions nobody is left to retrieve
+        if not task.cancelled():
+            task.exception()
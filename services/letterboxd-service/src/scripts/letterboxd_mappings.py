@@ -0,0 +1,72 @@
+import sys
+import json
+import asyncio
+import argparse
+from pathlib import Path
+
+# Allow running as `python3 src/scripts/letterboxd_mappings.py export|import ...`
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.database.mapping_dump import POLICIES, export_mappings, import_mappings  # noqa: E402
+
+READ_SIZE = 1024 * 1024
+
+
+# Dump the slug → TMDB table to `path` (stdout for "-"), gzipped for *.gz
+async def export(path):
+    out = sys.stdout.buffer if path == "-" else open(path, "wb")
+    count = 0
+    try:
+        async for data in export_mappings(compress=path.endswith(".gz")):
+            await asyncio.to_thread(out.write, data)
+            count += len(data)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    return {"bytes": count}
+
+
+# Load a dump (plain or gzipped NDJSON; stdin for "-") into the table
+async def load(path, policy):
+    source = sys.stdin.buffer if path == "-" else open(path, "rb")
+
+    async def chunks():
+        while data := await asyncio.to_thread(source.read, READ_SIZE):
+            yield data
+
+    def progress(stats):
+        print(f"\r{stats['read']} read, {stats['upserted']} upserted, "
+              f"{stats['modified']} modified, {stats['invalid']} invalid",
+              end="", file=sys.stderr, flush=True)
+
+    try:
+        return await import_mappings(chunks(), policy, on_progress=progress)
+    finally:
+        print(file=sys.stderr)
+        if source is not sys.stdin.buffer:
+            source.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import the slug → TMDB mapping table")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="write the table as NDJSON")
+    export_parser.add_argument("path", nargs="?", default="-",
+                               help="output file, gzipped if it ends in .gz (default stdout)")
+
+    import_parser = commands.add_parser("import", help="load an NDJSON dump")
+    import_parser.add_argument("path", nargs="?", default="-",
+                               help="dump file, plain or gzipped (default stdin)")
+    import_parser.add_argument("--policy", choices=POLICIES, default="skip",
+                               help="for slugs already mapped (default: skip)")
+
+    args = parser.parse_args()
+
+    # Prints a summary of what was written
+    if args.command == "export":
+        stats = asyncio.run(export(args.path))
+    else:
+        stats = asyncio.run(load(args.path, args.policy))
+
+    print(json.dumps(stats), file=sys.stderr if args.command == "export" and args.path == "-" else sys.stdout, flush=True)
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from benchmarks.standin import film_slug, list_page
+from src.scraper import lists
+
+PER_PAGE = 24
+
+
+def sync(monkeypatch, films, snapshot):
+    async def fetch_page(username, list_type, page):
+        return list_page(username, films, page, PER_PAGE)
+
+    monkeypatch.setattr(lists, "_fetch_page", fetch_page)
+    return asyncio.run(lists.sync_list("someone", "watched", snapshot))
+
+
+def slugs(snapshot):
+    return [slug for slug, _ in snapshot["entries"]]
+
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    return sync(monkeypatch, list(range(300)), None)
+
+
+def test_added_at_top(monkeypatch, snapshot):
+    films = [300, 301] + list(range(300))
+    result = sync(monkeypatch, films, snapshot)
+    assert slugs(result) == [film_slug(i) for i in films]
+    assert not result["full"]
+
+
+def test_removed_at_top(monkeypatch, snapshot):
+    films = list(range(1, 300))
+    result = sync(monkeypatch, films, snapshot)
+    assert slugs(result) == [film_slug(i) for i in films]
+    assert not result["full"]
+
+
+# A known film re-added to a watchlist jumps to the top: the page no longer
+# matches the snapshot's order, so nothing may be spliced from it
+def test_known_film_moved_to_top(monkeypatch, snapshot):
+    films = [5] + [i for i in range(300) if i != 5]
+    result = sync(monkeypatch, films, snapshot)
+    assert slugs(result) == [film_slug(i) for i in films]
+    assert result["full"]
@@ -0,0 +1,30 @@
+import asyncio
+
+from src.scraper.scheduler import FairScheduler
+
+
+async def _noop(scheduler):
+    async with scheduler.slot():
+        pass
+
+
+# A queued waiter is cancelled and the only slot released before the
+# waiter's task has run: the slot must not be handed to the dead waiter
+# (as when a hedged request cancels its queued hedge)
+def test_cancel_then_release():
+    async def main():
+        scheduler = FairScheduler(rate=0, burst=1, max_in_flight=1)
+
+        async with scheduler.slot():
+            queued = asyncio.create_task(_noop(scheduler))
+            await asyncio.sleep(0)
+            queued.cancel()
+
+        await asyncio.gather(queued, return_exceptions=True)
+        assert queued.cancelled()
+        assert scheduler.in_flight == 0
+
+        await asyncio.wait_for(_noop(scheduler), 1)
+        assert scheduler.in_flight == 0
+
+    asyncio.run(main())
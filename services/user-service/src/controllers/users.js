@@ -367,20 +367,40 @@ export const getUserWatched = async (req, res) => {
 // ----------------------
 // Letterboxd Import
 // ----------------------
+// The import runs as a job on the letterboxd-service and can take minutes:
+// answer 202 with the job id as soon as it's started, then wait for it and
+// save the films in the background
 export const updateUserWatchedLetterboxd = async (req, res) => {
   const username = req.body.letterboxd;
+  const userId = req.params.userID;
 
-  const movies = await fetchLetterboxdWatched(username);
-  console.log("Fetched movies:", movies);
-
-  if (!Array.isArray(movies)) {
-    return res.status(500).send({
-      "status-code": 500,
-      message: "Letterboxd service returned invalid data",
+  let jobId;
+  try {
+    jobId = await startLetterboxdImport(username);
+  } catch (error) {
+    console.error("Error calling letterboxd-service:", error.message);
+    return res.status(502).send({
+      "status-code": 502,
+      message: "Could not start the Letterboxd import",
     });
   }
 
-  const userId = req.params.userID;
+  res.status(202).send({
+    "status-code": 202,
+    message: "Letterboxd import started",
+    jobId,
+  });
+
+  // A failed or timed-out import saves nothing
+  saveLetterboxdImport(userId, jobId).catch((error) =>
+    console.error("Letterboxd import not saved:", error.message)
+  );
+};
+
+async function saveLetterboxdImport(userId, jobId) {
+  const movies = await waitForLetterboxdJob(jobId);
+  console.log("Fetched movies:", movies.length);
+
   let user = await User.findById(userId);
   if (!user) user = new User({ _id: userId, username: "asd" });
 
@@ -392,12 +412,7 @@ export const updateUserWatchedLetterboxd = async (req, res) => {
   }
 
   await user.save();
-
-  res.status(200).send({
-    "status-code": 200,
-    message: "Movies added Successfully",
-  });
-};
+}
 
 
 // ----------------------
@@ -416,17 +431,59 @@ export const getUserMovieRating = async (req, res) => {
 // ----------------------
 // Helper: Letterboxd Scraper
 // ----------------------
-async function fetchLetterboxdWatched(username) {
-  try {
-    const response = await axios.get(
-      `http://letterboxd-service:3003/letterboxd/watched/${username}`
-    );
+const LETTERBOXD_URL = "http://letterboxd-service:3003/letterboxd";
+const JOB_POLL_INTERVAL_MS = 2000;
+const JOB_TIMEOUT_MS = 30 * 60 * 1000;
+const JOB_POLL_MAX_BACKOFF_MS = 30 * 1000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Imports run as background jobs on the letterboxd-service: start one,
+// then poll it until it finishes
+async function startLetterboxdImport(username) {
+  const { data: job } = await axios.post(`${LETTERBOXD_URL}/jobs`, {
+    username,
+    type: "watched",
+  });
+  return job.jobId;
+}
+
+// Resolves with the imported films; throws if the job failed, vanished or
+// didn't finish in time. A poll that errors (network, 5xx) is retried with
+// backoff until the deadline.
+async function waitForLetterboxdJob(jobId) {
+  const deadline = Date.now() + JOB_TIMEOUT_MS;
+  let retryDelay = JOB_POLL_INTERVAL_MS;
+
+  while (Date.now() < deadline) {
+    let data;
+    try {
+      // Columnar: result is { movieIds: [...], ratings: [...] }
+      ({ data } = await axios.get(`${LETTERBOXD_URL}/jobs/${jobId}`, {
+        params: { format: "columnar" },
+      }));
+    } catch (error) {
+      if (error.response?.status === 404) {
+        throw new Error(`Letterboxd import ${jobId} not found`);
+      }
+      console.error("Error polling letterboxd-service, retrying:", error.message);
+      await sleep(Math.min(retryDelay, Math.max(0, deadline - Date.now())));
+      retryDelay = Math.min(retryDelay * 2, JOB_POLL_MAX_BACKOFF_MS);
+      continue;
+    }
+    retryDelay = JOB_POLL_INTERVAL_MS;
 
-    // Service already returns: { movieId, rating }
-    return response.data;
+    // TMDB IDs come back as ints; watched entries key on the string form
+    if (data.status === "done") {
+      const { movieIds, ratings } = data.result;
+      return movieIds.map((id, i) => ({ movieId: String(id), rating: ratings[i] }));
+    }
+    if (data.status === "failed") {
+      throw new Error(`Letterboxd import ${jobId} failed: ${data.error}`);
+    }
 
-  } catch (error) {
-    console.error("Error calling letterboxd-service:", error.message);
-    return [];
+    await sleep(JOB_POLL_INTERVAL_MS);
   }
-}
\ No newline at end of file
+
+  throw new Error(`Letterboxd import ${jobId} timed out`);
+}